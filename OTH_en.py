@@ -1,3 +1,19 @@
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+
+from traffic import TrafficStore, segment_positions
+
+MAX_IO_CARDS = 70  # I/O card slots per OTN switch
+MAX_CAPACITY = 12288  # Switching capacity per OTN switch (Gb/s)
+MAX_ODUS = 100  # ODU frames per OTN switch
+LIGHTPATH_CAPACITY = 500  # Bandwidth of one lightpath (WDM channel) in Gb/s
+
+def lightpaths_for(bandwidth):
+    """Lightpaths needed to carry bandwidth Gb/s, for an int or an integer numpy array"""
+    return (bandwidth + LIGHTPATH_CAPACITY - 1) // LIGHTPATH_CAPACITY
+
 class OTN1:
     def __init__(self):
         self.odu_10_in = 0 # Number of 10G ODUs received from the outside
@@ -70,6 +86,10 @@ class OTN2:
 
         # ODU exchange between OTN2 and other nodes (optical path exchange)
         self.node_exchanges = {}  # Record ODU exchanges with other nodes, format: {node: {'10_in': x, '100_in': y, '10_out': z, '100_out': w}}
+        # Sums of the I/O cards and optical paths of all node exchanges, kept in step by update_node_exchange or
+        # recomputed by refresh_node_totals
+        self.node_io_cards = 0
+        self.node_connections = 0
 
     def exchange_with_otn1(self):
         """Exchange ODUs with OTN1, automatically update based on the number of ODUs exchanged with the outside"""
@@ -95,20 +115,58 @@ class OTN2:
                 self.odu_100_physical_out += count
 
     def exchange_with_node(self, odu_type, count, direction, target_node):
-        """Exchange ODUs with other nodes, update counters"""
+        """Exchange ODUs with other nodes, update counters (call refresh_node_totals once all exchanges are made)"""
         if target_node not in self.node_exchanges:
             self.node_exchanges[target_node] = {'10_in': 0, '100_in': 0, '10_out': 0, '100_out': 0}
+        exchanges = self.node_exchanges[target_node]
 
         if direction == 'in':
             if odu_type == '10':
-                self.node_exchanges[target_node]['10_in'] += count
+                exchanges['10_in'] += count
             elif odu_type == '100':
-                self.node_exchanges[target_node]['100_in'] += count
+                exchanges['100_in'] += count
         elif direction == 'out':
             if odu_type == '10':
-                self.node_exchanges[target_node]['10_out'] += count
+                exchanges['10_out'] += count
             elif odu_type == '100':
-                self.node_exchanges[target_node]['100_out'] += count
+                exchanges['100_out'] += count
+
+    def update_node_exchange(self, odu_type, count, direction, target_node):
+        """Same as exchange_with_node, keeping node_io_cards and node_connections in step (used by Network.admit)"""
+        exchanges = self.node_exchanges.get(target_node)
+        if exchanges is not None:
+            self.node_io_cards -= self._exchange_io_cards(exchanges)
+            self.node_connections -= self._exchange_connections(exchanges)
+        self.exchange_with_node(odu_type, count, direction, target_node)
+        exchanges = self.node_exchanges[target_node]
+        self.node_io_cards += self._exchange_io_cards(exchanges)
+        self.node_connections += self._exchange_connections(exchanges)
+
+    def refresh_node_totals(self):
+        """Recompute node_io_cards and node_connections from node_exchanges after bulk exchanges"""
+        io_cards = 0
+        connections = 0
+        for exchanges in self.node_exchanges.values():
+            total_node_10 = exchanges['10_in'] + exchanges['10_out']
+            total_node_100 = exchanges['100_in'] + exchanges['100_out']
+            io_cards += (total_node_10 + 9) // 10 + total_node_100
+            connections += lightpaths_for(total_node_10 * 10 + total_node_100 * 100)
+        self.node_io_cards = io_cards
+        self.node_connections = connections
+
+    @staticmethod
+    def _exchange_io_cards(exchanges):
+        """I/O cards needed for the exchange with one node"""
+        total_node_10 = exchanges['10_in'] + exchanges['10_out']
+        total_node_100 = exchanges['100_in'] + exchanges['100_out']
+        return (total_node_10 + 9) // 10 + total_node_100
+
+    @staticmethod
+    def _exchange_connections(exchanges):
+        """Optical paths needed for the exchange with one node"""
+        total_node_bandwidth = (exchanges['10_in'] + exchanges['10_out']) * 10 + \
+                               (exchanges['100_in'] + exchanges['100_out']) * 100
+        return lightpaths_for(total_node_bandwidth)
 
     def calculate_io_cards(self):
         """Calculate the number of I/O cards required for OTN2"""
@@ -124,12 +182,8 @@ class OTN2:
         io_cards_physical = (total_physical_10 + 9) // 10 + total_physical_100
         io_cards += io_cards_physical
 
-        # Calculate I/O cards for exchange with other nodes
-        for node, exchanges in self.node_exchanges.items():
-            total_node_10 = exchanges['10_in'] + exchanges['10_out']
-            total_node_100 = exchanges['100_in'] + exchanges['100_out']
-            io_cards_node = (total_node_10 + 9) // 10 + total_node_100
-            io_cards += io_cards_node
+        # Calculate I/O cards for exchange with other nodes (running sum over node_exchanges)
+        io_cards += self.node_io_cards
 
         return io_cards
 
@@ -138,13 +192,10 @@ class OTN2:
         # Calculate optical paths for exchange with the outside world
         total_physical_bandwidth = (self.odu_10_physical_in + self.odu_10_physical_out) * 10 + \
                                    (self.odu_100_physical_in + self.odu_100_physical_out) * 100
-        physical_connections = (total_physical_bandwidth + 499) // 500
+        physical_connections = lightpaths_for(total_physical_bandwidth)
 
-        # Calculate optical paths for exchange with other nodes
-        for node, exchanges in self.node_exchanges.items():
-            total_node_bandwidth = (exchanges['10_in'] + exchanges['10_out']) * 10 + \
-                                   (exchanges['100_in'] + exchanges['100_out']) * 100
-            physical_connections += (total_node_bandwidth + 499) // 500
+        # Calculate optical paths for exchange with other nodes (running sum over node_exchanges)
+        physical_connections += self.node_connections
 
         return physical_connections
 
@@ -154,7 +205,7 @@ class OTN2:
         capacity_otn1 = self.calculate_io_cards_otn1() * 100
 
         # Capacity consumption for optical paths
-        capacity_physical = self.calculate_physical_connections() * 500
+        capacity_physical = self.calculate_physical_connections() * LIGHTPATH_CAPACITY
 
         return capacity_otn1 + capacity_physical
 
@@ -173,6 +224,23 @@ class Network:
         self.nodes_otn1 = {}  # Store OTN1 instances for all nodes
         self.nodes_otn2 = {}  # Store OTN2 instances for all nodes
         self.connections = set()  # Store connections between nodes, format: {(node1, node2)}
+        self.link_bandwidth = {}  # Running bandwidth of admitted services per link, format: {(node1, node2): Gb/s} with node1 < node2
+        self.wdm_count = 0  # Running number of WDMs, kept in step with link_bandwidth by admit/release
+        self.last_violation = None  # Limit broken by the last rejected admit ('io_cards', 'capacity', 'odu_count')
+        # Residual headroom per node, kept up to date by admit/release for the nodes of each path, format:
+        # {node: (OTN1 I/O cards, OTN1 capacity, OTN2 I/O cards, OTN2 capacity, ODUs)} left before the limits
+        self.headroom = {}
+        # Reverse indexes to the services admitted by admit, format: {(node1, node2): {id(service): service}} with
+        # node1 < node2 and {node: {id(service): service}}
+        self.link_services = {}
+        self.node_services = {}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Service ids change when the network is copied to another process or loaded from a checkpoint
+        for index in (self.link_services, self.node_services):
+            for key, services in index.items():
+                index[key] = {id(service): service for service in services.values()}
 
     def add_node(self, node_name):
         """Add a node to the network"""
@@ -180,6 +248,8 @@ class Network:
             self.nodes_otn1[node_name] = OTN1()
         if node_name not in self.nodes_otn2:
             self.nodes_otn2[node_name] = OTN2(node_name)
+        if node_name not in self.headroom:
+            self.headroom[node_name] = self.node_headroom(node_name)
 
     def add_connection(self, node1, node2):
         """Add a connection between nodes"""
@@ -191,7 +261,9 @@ class Network:
         self.connections.add((node2, node1))  # Bidirectional connection
 
     def process_services(self, services):
-        """Process the list of services, update ODU exchange information for nodes"""
+        """Process the list of services (or the routed services of a TrafficStore), update ODU exchange information for nodes"""
+        if isinstance(services, TrafficStore):
+            services = services.grooming_services()
         for service in services:
             odu_size = service['odu_size']  # ODU size (10G or 100G)
             path = service['path']          # Service path (list of nodes)
@@ -226,6 +298,8 @@ class Network:
                     self.nodes_otn2[target_node].exchange_with_node('10', exchanges['10_out'], 'in', node_name)
                 if '100_out' in exchanges:
                     self.nodes_otn2[target_node].exchange_with_node('100', exchanges['100_out'], 'in', node_name)
+        for otn2 in self.nodes_otn2.values():
+            otn2.refresh_node_totals()
 
     def calculate_wdm_count(self):
         """Calculate the number of WDMs used in the entire network"""
@@ -243,7 +317,7 @@ class Network:
                 # Total bandwidth
                 total_bandwidth = bandwidth_1_to_2 + bandwidth_2_to_1
                 # Calculate the number of WDMs
-                wdm_count += (total_bandwidth + 499) // 500
+                wdm_count += lightpaths_for(total_bandwidth)
         return wdm_count
 
     def calculate_total_io_cards(self):
@@ -268,6 +342,221 @@ class Network:
                 total_odu_100 += exchanges['100_in'] + exchanges['100_out']
         return total_odu_10 + total_odu_100
 
+    def node_headroom(self, node_name):
+        """Resources left on the node before each limit, format like self.headroom (negative once a limit is broken)"""
+        otn1 = self.nodes_otn1[node_name]
+        otn2 = self.nodes_otn2[node_name]
+        return (MAX_IO_CARDS - otn1.calculate_io_cards(), MAX_CAPACITY - otn1.calculate_capacity(),
+                MAX_IO_CARDS - otn2.calculate_io_cards(), MAX_CAPACITY - otn2.calculate_capacity(),
+                MAX_ODUS - otn2.nb_of_odu())
+
+    @staticmethod
+    def _headroom_violation(headroom):
+        """First limit broken according to a headroom tuple, or None"""
+        if headroom[0] < 0 or headroom[2] < 0:
+            return 'io_cards'
+        if headroom[1] < 0 or headroom[3] < 0:
+            return 'capacity'
+        if headroom[4] < 0:
+            return 'odu_count'
+        return None
+
+    def node_violation(self, node_name):
+        """Return the first limit broken by the node ('io_cards', 'capacity' or 'odu_count'), or None if it fits"""
+        return self._headroom_violation(self.node_headroom(node_name))
+
+    def link_wdm_delta(self, node1, node2, bandwidth):
+        """Number of WDMs the link needs in addition for bandwidth more Gb/s (0 while its last lightpath has room)"""
+        old_bandwidth = self.link_bandwidth.get((node1, node2) if node1 < node2 else (node2, node1), 0)
+        return lightpaths_for(old_bandwidth + bandwidth) - lightpaths_for(old_bandwidth)
+
+    def hop_usage(self, odu_size, node1, node2):
+        """(I/O cards, lightpaths) that a service of odu_size adds at each end of the hop node1-node2"""
+        bandwidth = int(odu_size)
+        if bandwidth == 100:
+            cards = 1
+        else:
+            exchanges = self.nodes_otn2[node1].node_exchanges.get(node2)
+            odu_10 = exchanges['10_in'] + exchanges['10_out'] if exchanges is not None else 0
+            cards = 1 if odu_10 % 10 == 0 else 0  # The last 10G card of the exchange is full
+        return cards, self.link_wdm_delta(node1, node2, bandwidth)
+
+    def screen_node(self, odu_size, node_name, hop_usages, endpoint):
+        """
+        Check one node of a path against the headroom index without changing the state. The exchanges with the
+        neighbours on the path and the add/drop at an end point are counted exactly, so the answer is the one admit
+        gives for this node.
+
+        :param odu_size: '10' or '100'
+        :param node_name: node to check
+        :param hop_usages: hop_usage of the one or two hops of the path at this node
+        :param endpoint: True if the service is added or dropped at the node
+        :return: limit the node would break, or None
+        """
+        otn1_io, otn1_capacity, otn2_io, otn2_capacity, odus = self.headroom[node_name]
+        for cards, lightpaths in hop_usages:
+            otn2_io -= cards
+            otn2_capacity -= lightpaths * LIGHTPATH_CAPACITY
+        if endpoint:
+            endpoint_usage = self._endpoint_usage(odu_size, node_name, 1)
+            otn1_io -= endpoint_usage[0]
+            otn1_capacity -= endpoint_usage[1]
+            otn2_io -= endpoint_usage[2]
+            otn2_capacity -= endpoint_usage[3]
+            odus -= endpoint_usage[4]
+        return self._headroom_violation((otn1_io, otn1_capacity, otn2_io, otn2_capacity, odus))
+
+    def _endpoint_usage(self, odu_size, node_name, ends):
+        """
+        Exact resources added at a node where the service is added and/or dropped ends times (besides the
+        exchanges with its neighbours), format like self.headroom
+        """
+        otn1 = self.nodes_otn1[node_name]
+        otn2 = self.nodes_otn2[node_name]
+        if odu_size == '10':
+            odu_10 = otn1.odu_10_in + otn1.odu_10_out
+            otn1_cards = (odu_10 + ends + 9) // 10 - (odu_10 + 9) // 10
+            odu_10 = otn2.odu_10_physical_in + otn2.odu_10_physical_out
+            otn2_cards = (odu_10 + ends + 9) // 10 - (odu_10 + 9) // 10
+        else:
+            otn1_cards = ends
+            otn2_cards = ends
+        physical_bandwidth = (otn2.odu_10_physical_in + otn2.odu_10_physical_out) * 10 + \
+                             (otn2.odu_100_physical_in + otn2.odu_100_physical_out) * 100
+        physical_lightpaths = lightpaths_for(physical_bandwidth + int(odu_size) * ends) - \
+                              lightpaths_for(physical_bandwidth)
+        # OTN1 cards for add/drop and the forwards to OTN2, OTN2 cards for add/drop and the exchange with OTN1
+        return (2 * otn1_cards, 200 * otn1_cards, 2 * otn2_cards,
+                otn2_cards * 100 + physical_lightpaths * LIGHTPATH_CAPACITY, ends)
+
+    def evaluate_candidates(self, service, paths):
+        """
+        Check candidate paths of a service against the current state in one pass without changing it. Gives the
+        same answer as admit: links shared by several paths and the end points are only evaluated once.
+
+        :param service: {'odu_size': '10' or '100'}, a 'path' entry is ignored
+        :param paths: candidate paths (lists of nodes) between the same end points
+        :return: list of {'path', 'fits', 'violation', 'wdm_delta'} in the order of paths, violation being the
+                 first limit broken along the path ('io_cards', 'capacity', 'odu_count') or None if it fits
+        """
+        odu_size = service['odu_size']
+        hop_usages = {}  # (node1, node2) -> hop_usage
+        endpoint_usages = {}  # (node, ends) -> _endpoint_usage
+        evaluations = []
+        for path in paths:
+            usages = []
+            for hop in zip(path, path[1:]):
+                usage = hop_usages.get(hop)
+                if usage is None:
+                    usage = hop_usages[hop] = self.hop_usage(odu_size, hop[0], hop[1])
+                usages.append(usage)
+            violation = None
+            last = len(path) - 1
+            for index, node_name in enumerate(path):
+                otn1_io, otn1_capacity, otn2_io, otn2_capacity, odus = self.headroom[node_name]
+                # usages[index - 1] arrives at the node, usages[index] leaves it
+                for cards, lightpaths in usages[max(index - 1, 0):index + 1]:
+                    otn2_io -= cards
+                    otn2_capacity -= lightpaths * LIGHTPATH_CAPACITY
+                ends = (index == 0) + (index == last)
+                if ends:
+                    key = (node_name, ends)
+                    usage = endpoint_usages.get(key)
+                    if usage is None:
+                        usage = endpoint_usages[key] = self._endpoint_usage(odu_size, node_name, ends)
+                    otn1_io -= usage[0]
+                    otn1_capacity -= usage[1]
+                    otn2_io -= usage[2]
+                    otn2_capacity -= usage[3]
+                    odus -= usage[4]
+                violation = self._headroom_violation((otn1_io, otn1_capacity, otn2_io, otn2_capacity, odus))
+                if violation is not None:
+                    break
+            evaluations.append({
+                'path': path,
+                'fits': violation is None,
+                'violation': violation,
+                'wdm_delta': sum(lightpaths for _, lightpaths in usages)
+            })
+        return evaluations
+
+    def _update_link_bandwidth(self, node1, node2, bandwidth):
+        """Add bandwidth (Gb/s, may be negative) to a link and keep the running WDM count in step"""
+        link = (node1, node2) if node1 < node2 else (node2, node1)
+        old_bandwidth = self.link_bandwidth.get(link, 0)
+        new_bandwidth = old_bandwidth + bandwidth
+        self.link_bandwidth[link] = new_bandwidth
+        self.wdm_count += lightpaths_for(new_bandwidth) - lightpaths_for(old_bandwidth)
+
+    def _apply_service(self, odu_size, path, count):
+        """Add (count=1) or remove (count=-1) one service on the nodes and links of its path only"""
+        source = path[0]
+        destination = path[-1]
+        # Same updates as process_services for the end points
+        self.nodes_otn1[source].receive_odu(odu_size, count)
+        self.nodes_otn2[source].exchange_with_physical(odu_size, count, 'in')
+        self.nodes_otn1[destination].send_odu(odu_size, count)
+        self.nodes_otn2[destination].exchange_with_physical(odu_size, count, 'out')
+
+        # Same updates as process_services + propagate_odu_exchanges for each hop
+        bandwidth = int(odu_size) * count
+        for node_name, next_node_name in zip(path, path[1:]):
+            self.nodes_otn2[node_name].update_node_exchange(odu_size, count, 'out', next_node_name)
+            self.nodes_otn2[next_node_name].update_node_exchange(odu_size, count, 'in', node_name)
+            self._update_link_bandwidth(node_name, next_node_name, bandwidth)
+
+        # Only the end points exchange ODUs between OTN1 and OTN2
+        for node_name in (source, destination):
+            self.nodes_otn1[node_name].forward_odu_to_otn2()
+            self.nodes_otn1[node_name].forward_odu_from_otn2()
+            self.nodes_otn2[node_name].exchange_with_otn1()
+
+    def admit(self, service):
+        """
+        Add one service to the running network state, checking the limits only on the nodes of its path.
+        A service that does not fit is rolled back. Do not mix with run_network on the same instance.
+
+        :param service: {'odu_size': '10' or '100', 'path': list of nodes}
+        :return: (can_use, wdm_count) like run_network, wdm_count being the running count after the call
+        """
+        path = service['path']
+        self._apply_service(service['odu_size'], path, 1)
+        for node_name in path:
+            headroom = self.node_headroom(node_name)
+            violation = self._headroom_violation(headroom)
+            if violation is not None:
+                self.release(service)  # Rolls back and refreshes the headroom of the whole path
+                self.last_violation = violation
+                return 0, self.wdm_count
+            self.headroom[node_name] = headroom
+        service_id = id(service)
+        for node_name, next_node_name in zip(path, path[1:]):
+            link = (node_name, next_node_name) if node_name < next_node_name else (next_node_name, node_name)
+            self.link_services.setdefault(link, {})[service_id] = service
+        for node_name in path:
+            self.node_services.setdefault(node_name, {})[service_id] = service
+        self.last_violation = None
+        return 1, self.wdm_count
+
+    def release(self, service):
+        """Remove a previously admitted service from the running network state, return the running WDM count"""
+        path = service['path']
+        self._apply_service(service['odu_size'], path, -1)
+        for node_name in path:
+            self.headroom[node_name] = self.node_headroom(node_name)
+        # Also used by admit to roll back a service that was never indexed
+        service_id = id(service)
+        for node_name, next_node_name in zip(path, path[1:]):
+            link = (node_name, next_node_name) if node_name < next_node_name else (next_node_name, node_name)
+            services = self.link_services.get(link)
+            if services is not None:
+                services.pop(service_id, None)
+        for node_name in path:
+            services = self.node_services.get(node_name)
+            if services is not None:
+                services.pop(service_id, None)
+        return self.wdm_count
+
     def run_network(self, services):
         """Run the network"""
         # Process the list of services
@@ -283,25 +572,13 @@ class Network:
             otn2.exchange_with_otn1()
         can_use = 1
         # Calculate the number of I/O cards and capacity consumption for each node
-        for node_name, otn1 in self.nodes_otn1.items():
-            if(otn1.calculate_io_cards() > 70):
-                # print(f"Node {node_name} I/O card count does not meet requirements")
-                can_use = 0
-            if(otn1.calculate_capacity() > 12288):
-                # print(f"Node {node_name} OTN1 total capacity does not meet requirements")
-                can_use = 0
-
-        for node_name, otn2 in self.nodes_otn2.items():
-            if(otn2.calculate_io_cards() > 70):
-                # print(f"Node {node_name} OTN2 I/O card count does not meet requirements")
-                can_use = 0
-            if(otn2.calculate_capacity() > 12288):
-                # print(f"Node {node_name} OTN2 total capacity does not meet requirements")
+        for otn1 in self.nodes_otn1.values():
+            if otn1.calculate_io_cards() > MAX_IO_CARDS or otn1.calculate_capacity() > MAX_CAPACITY:
                 can_use = 0
-            if((otn2.nb_of_odu()) > 100):
-                # print(f"Node {node_name} ODU count does not meet requirements")
+        for otn2 in self.nodes_otn2.values():
+            if otn2.calculate_io_cards() > MAX_IO_CARDS or otn2.calculate_capacity() > MAX_CAPACITY or \
+                    otn2.nb_of_odu() > MAX_ODUS:
                 can_use = 0
-            #print(f"Node {node_name} OTN2 I/O Number: {otn2.calculate_io_cards()}, Lightpaths: {otn2.calculate_physical_connections()}, Capacity: {otn2.calculate_capacity()} Gb/s")
         
         # total_io_cards = self.calculate_total_io_cards()
         # total_capacity = self.calculate_total_capacity()
@@ -317,6 +594,305 @@ class Network:
         # print(f"Number of WDM used in the entire network: {wdm_count}")
         return can_use, wdm_count
 
+class ArrayNetwork:
+    """
+    Array-backed bulk-evaluation backend giving the same results as Network for the operations it supports:
+    process_services/run_network, admit/release (with last_violation), violations/node_violation and the totals.
+    It has no headroom index, screen_node or evaluate_candidates, so groom_service and the auxiliary-graph engine
+    need a Network.
+    Per-node ODU counters live in node_odu[node, rate, kind] with rate 0/1 = 10G/100G and kind 0/1/2 = in/out/forward,
+    per-link ODUs in link_odu[edge, direction, rate] with direction 0 = edge_nodes[edge, 0] -> edge_nodes[edge, 1].
+    'forward' counts ODUs passing through the node as an intermediate hop; it does not enter the limits.
+    """
+    RATE_CODES = {'10': 0, '100': 1}  # ODU size -> rate index
+    RATE_GBPS = np.array([10, 100])  # Rate index -> Gb/s
+
+    def __init__(self):
+        self.nodes = []  # Node names in index order
+        self.node_index = {}  # Node name -> index
+        self.edge_index = {}  # (node index, node index) -> edge index, stored for both directions
+        self._edge_list = []  # (node index, node index) per edge, first index is the smaller
+        self.node_odu = np.zeros((0, 2, 3), dtype=np.int64)
+        self.link_odu = np.zeros((0, 2, 2), dtype=np.int64)
+        self.edge_nodes = np.zeros((0, 2), dtype=np.int64)
+        self.wdm_count = 0  # Running number of WDMs, kept in step by process_services/admit/release
+        self.last_violation = None  # Limit that made the last admit fail, like Network.last_violation
+        self._lookup_size = None  # (nodes, edges) the link lookup and incidence arrays were built for
+
+    @classmethod
+    def from_edges(cls, edges, nodes=()):
+        """
+        Build an ArrayNetwork from an (m, 2) edge array, e.g. the one returned by topology.load_topology
+
+        :param edges: node pair of each link
+        :param nodes: extra nodes to add first (e.g. nodes without links), in index order
+        """
+        network = cls()
+        for node_name in nodes:
+            network.add_node(node_name)
+        edges = np.asarray(edges).reshape(-1, 2)
+        for node1, node2 in zip(edges[:, 0].tolist(), edges[:, 1].tolist()):
+            network.add_connection(node1, node2)
+        network._ensure_arrays()
+        return network
+
+    def add_node(self, node_name):
+        """Add a node to the network"""
+        if node_name not in self.node_index:
+            self.node_index[node_name] = len(self.nodes)
+            self.nodes.append(node_name)
+
+    def add_connection(self, node1, node2):
+        """Add a connection between nodes"""
+        self.add_node(node1)
+        self.add_node(node2)
+        index1 = self.node_index[node1]
+        index2 = self.node_index[node2]
+        if (index1, index2) not in self.edge_index:
+            edge = len(self._edge_list)
+            self._edge_list.append((min(index1, index2), max(index1, index2)))
+            self.edge_index[(index1, index2)] = edge
+            self.edge_index[(index2, index1)] = edge
+
+    def _ensure_arrays(self):
+        """Grow the state arrays after nodes or connections were added, keeping the existing counters"""
+        num_nodes = len(self.nodes)
+        num_edges = len(self._edge_list)
+        if self.node_odu.shape[0] < num_nodes:
+            grown = np.zeros((num_nodes, 2, 3), dtype=np.int64)
+            grown[:self.node_odu.shape[0]] = self.node_odu
+            self.node_odu = grown
+        if self.link_odu.shape[0] < num_edges:
+            grown = np.zeros((num_edges, 2, 2), dtype=np.int64)
+            grown[:self.link_odu.shape[0]] = self.link_odu
+            self.link_odu = grown
+            self.edge_nodes = np.array(self._edge_list, dtype=np.int64).reshape(-1, 2)
+        if self._lookup_size != (num_nodes, num_edges):
+            # Link lookup: sorted node pair keys (smaller index * number of nodes + larger index) and their edges
+            keys = self.edge_nodes[:, 0] * num_nodes + self.edge_nodes[:, 1]
+            self._edge_order = np.argsort(keys).astype(np.int64)
+            self._edge_keys = keys[self._edge_order]
+            # Incident edges of each node, flat with offsets
+            endpoints = self.edge_nodes.reshape(-1)
+            self._incident_edges = np.argsort(endpoints, kind='stable').astype(np.int64) // 2
+            self._incident_offsets = np.concatenate(([0], np.cumsum(np.bincount(endpoints, minlength=num_nodes))))
+            self._lookup_size = (num_nodes, num_edges)
+
+    def _index_paths(self, paths):
+        """(flat int64 array of the node indices of all paths, int64 array of path lengths)"""
+        lengths = np.fromiter(map(len, paths), dtype=np.int64, count=len(paths))
+        nodes = np.fromiter(map(self.node_index.__getitem__, chain.from_iterable(paths)), dtype=np.int64,
+                            count=int(lengths.sum()))
+        return nodes, lengths
+
+    def _edge_ids(self, first, second):
+        """Edge of each hop first[i] -> second[i] (node index arrays), KeyError if a hop has no link"""
+        keys = np.minimum(first, second) * len(self.nodes) + np.maximum(first, second)
+        positions = np.minimum(np.searchsorted(self._edge_keys, keys), max(len(self._edge_keys) - 1, 0))
+        if len(keys) and (not len(self._edge_keys) or (self._edge_keys[positions] != keys).any()):
+            raise KeyError('Path hop without a connection')
+        return self._edge_order[positions]
+
+    def _apply_paths(self, nodes, lengths, rates, count):
+        """
+        Add (count=1) or remove (count=-1) services given as flat paths with whole-array updates, keeping the
+        running WDM count in step on the links they use
+
+        :param nodes: node indices of all paths concatenated
+        :param lengths: number of nodes of each path
+        :param rates: rate index of each service
+        :return: edges used by the services, one entry per hop
+        """
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        node_rates = np.repeat(rates, lengths)
+        # Every position but the last of its path starts a hop, every position but the first and last is transit
+        is_hop = np.ones(len(nodes), dtype=bool)
+        is_hop[ends - 1] = False
+        is_transit = is_hop.copy()
+        is_transit[starts] = False
+        hop_positions = np.flatnonzero(is_hop)
+        first = nodes[hop_positions]
+        second = nodes[hop_positions + 1]
+        edges = self._edge_ids(first, second)
+
+        # Flat indices into node_odu[node, rate, kind] and link_odu[edge, direction, rate]
+        node_cells = np.concatenate(((nodes[starts] * 2 + rates) * 3,
+                                     (nodes[ends - 1] * 2 + rates) * 3 + 1,
+                                     (nodes[is_transit] * 2 + node_rates[is_transit]) * 3 + 2))
+        link_cells = (edges * 2 + (first > second)) * 2 + node_rates[hop_positions]
+        if len(edges) > len(self.link_odu):
+            # Large batch: recount all links once instead of finding the touched ones
+            self._add_cells(self.node_odu, node_cells, count)
+            self._add_cells(self.link_odu, link_cells, count)
+            self.wdm_count = self.calculate_wdm_count()
+        else:
+            touched = np.unique(edges)
+            wdm_before = int(self._edge_lightpaths(touched).sum())
+            self._add_cells(self.node_odu, node_cells, count)
+            self._add_cells(self.link_odu, link_cells, count)
+            self.wdm_count += int(self._edge_lightpaths(touched).sum()) - wdm_before
+        return edges
+
+    @staticmethod
+    def _add_cells(array, cells, count):
+        """Add count to the flat cells of array (repeats allowed): one bincount for batches, add.at for a few cells"""
+        if len(cells) * 8 > array.size:
+            array += count * np.bincount(cells, minlength=array.size).reshape(array.shape)
+        else:
+            np.add.at(array.reshape(-1), cells, count)
+
+    def _edge_lightpaths(self, edges):
+        """Lightpaths of the given edges, both directions together"""
+        totals = self.link_odu[edges].sum(axis=1)
+        return lightpaths_for(totals[:, 0] * 10 + totals[:, 1] * 100)
+
+    def _apply_services(self, services, count):
+        """Add (count=1) or remove (count=-1) a batch of services with whole-array updates"""
+        if isinstance(services, TrafficStore):
+            self._apply_traffic(services, count)
+            return
+        self._ensure_arrays()
+        services = list(services)
+        rates = np.fromiter(map(self.RATE_CODES.__getitem__, map(itemgetter('odu_size'), services)), dtype=np.int64,
+                            count=len(services))
+        nodes, lengths = self._index_paths([service['path'] for service in services])
+        self._apply_paths(nodes, lengths, rates, count)
+
+    def _apply_traffic(self, store, count):
+        """
+        _apply_services for the routed services of a TrafficStore: each distinct path is indexed once, then
+        gathered for all services using it with array operations
+        """
+        self._ensure_arrays()
+        data = store.data[store.data['path'] >= 0]
+        path_ids, service_paths = np.unique(data['path'], return_inverse=True)
+        service_paths = service_paths.reshape(-1).astype(np.int64)
+        path_nodes, path_lengths = self._index_paths([store.pool.paths[path_id] for path_id in path_ids.tolist()])
+        positions, lengths = segment_positions(np.concatenate(([0], np.cumsum(path_lengths))), service_paths)
+        self._apply_paths(path_nodes[positions], lengths, data['rate'].astype(np.int64), count)
+
+    def process_services(self, services):
+        """Process the list of services (or the routed services of a TrafficStore), update ODU exchange information for nodes"""
+        self._apply_services(services, 1)
+
+    def _link_totals(self):
+        """Return per-edge 10G and 100G ODU counts summed over both directions"""
+        totals = self.link_odu.sum(axis=1)
+        return totals[:, 0], totals[:, 1]
+
+    def _node_usage(self, nodes=None):
+        """
+        Return per-node arrays (OTN1 I/O cards, OTN2 I/O cards, OTN2 capacity, OTN2 ODU count)
+
+        :param nodes: node index array to compute, only reading their incident links, None for all nodes
+        """
+        self._ensure_arrays()
+        node_odu = self.node_odu if nodes is None else self.node_odu[nodes]
+        physical_10 = node_odu[:, 0, 0] + node_odu[:, 0, 1]
+        physical_100 = node_odu[:, 1, 0] + node_odu[:, 1, 1]
+        # OTN1 counts the external ODUs once for the outside and once for the forward to OTN2
+        physical_cards = (physical_10 + 9) // 10 + physical_100
+        otn1_io_cards = 2 * physical_cards
+
+        # Each endpoint of a link exchanges the ODUs of both directions with the other endpoint
+        if nodes is None:
+            link_10, link_100 = self._link_totals()
+            num_nodes = len(self.nodes)
+            owners = (self.edge_nodes[:, 0], self.edge_nodes[:, 1])
+        else:
+            positions, degrees = segment_positions(self._incident_offsets, nodes)
+            totals = self.link_odu[self._incident_edges[positions]].sum(axis=1)
+            link_10, link_100 = totals[:, 0], totals[:, 1]
+            num_nodes = len(nodes)
+            owners = (np.repeat(np.arange(num_nodes), degrees),)
+        link_cards = (link_10 + 9) // 10 + link_100
+        link_lightpaths = lightpaths_for(link_10 * 10 + link_100 * 100)
+        node_link_cards = sum(np.bincount(owner, link_cards, num_nodes) for owner in owners).astype(np.int64)
+        node_link_lightpaths = sum(np.bincount(owner, link_lightpaths, num_nodes) for owner in owners).astype(np.int64)
+
+        # OTN2 counts the external ODUs once for OTN1 and once for the outside, plus the link exchanges
+        otn2_io_cards = 2 * physical_cards + node_link_cards
+        physical_lightpaths = lightpaths_for(physical_10 * 10 + physical_100 * 100)
+        otn2_capacity = physical_cards * 100 + (physical_lightpaths + node_link_lightpaths) * LIGHTPATH_CAPACITY
+        otn2_odus = physical_10 + physical_100
+        return otn1_io_cards, otn2_io_cards, otn2_capacity, otn2_odus
+
+    def violations(self, nodes=None):
+        """
+        Return per-node boolean arrays of broken limits: {'io_cards': ..., 'capacity': ..., 'odu_count': ...}
+
+        :param nodes: node index array to check, None for all nodes
+        """
+        otn1_io_cards, otn2_io_cards, otn2_capacity, otn2_odus = self._node_usage(nodes)
+        return {
+            'io_cards': (otn1_io_cards > MAX_IO_CARDS) | (otn2_io_cards > MAX_IO_CARDS),
+            'capacity': (otn1_io_cards * 100 > MAX_CAPACITY) | (otn2_capacity > MAX_CAPACITY),
+            'odu_count': otn2_odus > MAX_ODUS
+        }
+
+    def node_violation(self, node_name):
+        """Return the first limit broken by the node ('io_cards', 'capacity' or 'odu_count'), or None if it fits"""
+        for constraint, broken in self.violations(np.array([self.node_index[node_name]], dtype=np.int64)).items():
+            if broken[0]:
+                return constraint
+        return None
+
+    def calculate_wdm_count(self):
+        """Calculate the number of WDMs used in the entire network"""
+        self._ensure_arrays()
+        link_10, link_100 = self._link_totals()
+        return int(lightpaths_for(link_10 * 10 + link_100 * 100).sum())
+
+    def calculate_total_io_cards(self):
+        """Calculate the total number of I/O cards for OTN1 and OTN2 in the entire network"""
+        otn1_io_cards, otn2_io_cards, _, _ = self._node_usage()
+        return int(otn1_io_cards.sum() + otn2_io_cards.sum())
+
+    def calculate_total_capacity(self):
+        """Calculate the total capacity consumption of the entire network"""
+        otn1_io_cards, _, otn2_capacity, _ = self._node_usage()
+        return int(otn1_io_cards.sum() * 100 + otn2_capacity.sum())
+
+    def calculate_otn2_non_otn1_odu(self):
+        """Calculate the size of ODUs exchanged by OTN2 (excluding ODUs exchanged with OTN1)"""
+        self._ensure_arrays()
+        # Every link exchange is seen by both of its endpoints
+        return int(2 * self.link_odu.sum())
+
+    def admit(self, service):
+        """Same as Network.admit: add one service, rolling it back if a node on its path breaks a limit"""
+        self._ensure_arrays()
+        rates = np.array([self.RATE_CODES[service['odu_size']]], dtype=np.int64)
+        nodes, lengths = self._index_paths([service['path']])
+        self._apply_paths(nodes, lengths, rates, 1)
+        # Only the nodes of the path changed, so only they can break a limit
+        violations = self.violations(nodes)
+        broken = np.flatnonzero(np.logical_or.reduce(list(violations.values())))
+        if len(broken):
+            self._apply_paths(nodes, lengths, rates, -1)
+            # First broken node along the path, then the first limit it breaks, as Network.admit reports it
+            self.last_violation = next(constraint for constraint, node_broken in violations.items()
+                                       if node_broken[broken[0]])
+            return 0, self.wdm_count
+        self.last_violation = None
+        return 1, self.wdm_count
+
+    def release(self, service):
+        """Remove a previously admitted service, return the WDM count"""
+        self._apply_services([service], -1)
+        return self.wdm_count
+
+    def run_network(self, services):
+        """Run the network, checking every node with whole-array operations"""
+        self.process_services(services)
+        can_use = 1
+        for broken in self.violations().values():
+            if broken.any():
+                can_use = 0
+        wdm_count = self.calculate_wdm_count()
+        return can_use, wdm_count
+
 '''
 # Example test
 network = Network()
@@ -1,262 +1,715 @@
+import argparse
+import os
 import random
 import networkx as nx
-from collections import deque
-from itertools import combinations
-import matplotlib.pyplot as plt
+from itertools import chain, islice
 import numpy as np
+import OTH_en
 from OTH_en import Network  # import Network class
+from checkpoint import load_checkpoint, save_checkpoint
+from grooming import AuxiliaryGraphEngine
+from paths import PathCache, PathTable, topology_fingerprint
+from profiling import profiler
+from results import ResultSink, plot_results
+from topology import MODELS, generate_topology, load_topology
+from traffic import RATES, PathPool, TrafficStore, segment_positions
 
 max_path = 3
 nbOfNode = 100
+path_cache_file = None  # If set, k-paths are loaded from and saved to this file between runs
+path_table_prefix = None  # If set, k-paths for all node pairs are precomputed into (or memory-mapped from) this table
+incremental_sweep = False  # If True, each load level extends the traffic of the previous one instead of redrawing it
+profile_file = None  # If set, per-phase timings and hot-path counters are written here per load level (.json or .csv)
+results_file = None  # If set, each load level's record is appended here as soon as it is computed (.csv, .jsonl, .parquet)
+plot_dir = None  # If set, the figures are written to this directory instead of being shown
+show_plots = True  # If False (headless), no figure is drawn; plot later with `python results.py <results_file>`
+checkpoint_file = None  # If set, the sweep state is snapshotted here after every completed load level
+no_grooming_policy = 'shortest'  # Path choice of the no-grooming baseline, one of NO_GROOMING_POLICIES
+NO_GROOMING_POLICIES = ['shortest', 'least_loaded']
+routing_policy = 'first_fit'  # Order in which groom_service tries the k paths, one of ROUTING_POLICIES
+ROUTING_POLICIES = ['first_fit', 'capacity_aware']
+rate_weights = None  # Relative weights of the 10G and 100G rates of generated services, None for equally likely
+aux_graph_comparison = False  # If True, each level also grooms its services with the auxiliary-graph engine
+
+STREAMS = ('topology', 'traffic', 'tie_breaking')  # Random streams a TrafficSimulator can seed separately
+
+class PairedRandom(random.Random):
+    """
+    Random generator whose integer draws (choice, sample, randrange) each take one uniform float, floor(U * n),
+    instead of rejection sampling on random bits, so its draws stay in step with an AntitheticRandom of the same seed.
+    """
+
+    def _randbelow(self, n):
+        return int(self.random() * n)
+
+class AntitheticRandom(PairedRandom):
+    """
+    Antithetic counterpart of PairedRandom with the same seed: every uniform U becomes 1 - U (kept in [0, 1)), and
+    integer draws follow it, so paired runs are negatively correlated while each stays uniformly distributed.
+    """
+
+    # random.Random gives subclasses that override random() its own rejection sampler, keep the paired one
+    _randbelow = PairedRandom._randbelow
+
+    def random(self):
+        # U is a multiple of 2 ** -53 below 1, so this maps [0, 1) onto itself
+        return (1.0 - 2.0 ** -53) - super().random()
 
 class TrafficSimulator:
-    def __init__(self, num_nodes):
+    def __init__(self, num_nodes, weight=None, path_cache_size=100000):
         self.num_nodes = num_nodes
         self.nodes = [i for i in range(num_nodes)]  # Use numbers as node names
         self.graph = nx.Graph()
-        self.path_cache = {}  # Cache calculated paths
-        
-    def create_network(self, topology_file=None, edge_probability=0.5):
+        self.weight = weight  # Edge attribute used as link weight by find_k_paths (None = hop count)
+        self.path_cache = PathCache(path_cache_size)  # Cache calculated paths, LRU beyond path_cache_size entries
+        self.topology_fingerprint = None  # Hash of the topology, part of every path cache key
+        self.path_table = None  # Precomputed all-pairs PathTable, used before the cache when it matches the topology
+        self.link_lookup = None  # (sorted link keys, link endpoints, key base), built on first use per topology
+        self.path_pool = PathPool()  # Distinct paths shared by the TrafficStores of generate_traffic
+        # Seeded random.Random per stream name in STREAMS (see seed_streams), the global random module is used for
+        # missing streams and random tie-breaking between equally good paths is off without 'tie_breaking'
+        self.streams = {}
+
+    def __getstate__(self):
+        # Checkpoints leave the path cache out: paths are deterministic for a topology and recomputed on demand
+        state = self.__dict__.copy()
+        state['path_cache'] = PathCache(self.path_cache.max_size)
+        return state
+
+    def seed_streams(self, seed, streams=STREAMS, antithetic=False):
+        """
+        Give each stream its own generator seeded from seed, so a stream can be replayed independently of the
+        others: re-seeding only 'traffic' offers the same services to another configuration (common random numbers).
+
+        :param seed: int or str seed shared by the streams, each stream derives its own generator from it
+        :param streams: names from STREAMS to seed
+        :param antithetic: draw the traffic stream antithetically, to pair with a normal run of the same seed
+        """
+        for name in streams:
+            if name == 'traffic':
+                generator = AntitheticRandom if antithetic else PairedRandom
+            else:
+                generator = random.Random
+            self.streams[name] = generator(f"{seed}:{name}")
+
+    def create_network(self, topology_file=None, edge_probability=0.5, model='erdos_renyi', connected=True,
+                       **model_options):
         """
         Create a network topology, either reading edges from a file or randomly generating edges and writing them to a file.
         
-        :param topology_file: Topology file path. If None, edges are randomly generated.
+        :param topology_file: Topology file path (edge list, binary .npy edge list, .gml, .graphml or node-link .json,
+                              see topology.load_topology). If None, edges are randomly generated.
         :param edge_probability: The probability of randomly generating an edge (a floating point number between 0 and 1)
+        :param model: random topology model, one of topology.MODELS ('erdos_renyi', 'waxman', 'geometric',
+                      'ring_mesh', 'degree_bounded')
+        :param connected: join the components of a generated topology so every node pair has a path
+        :param model_options: model parameters, see topology.generate_topology
         """
         self.graph.add_nodes_from(self.nodes)
+        edge_array = None
         
         if topology_file:
-            # Reading topology from file
-            with open(topology_file, 'r') as file:
-                for line in file:
-                    node1, node2 = map(int, line.strip().split())
-                    self.graph.add_edge(node1, node2)
+            # Reading topology from file in bulk, link attributes such as length are kept
+            graph, edge_array = load_topology(topology_file)
+            graph.add_nodes_from(self.nodes)
+            self.graph = graph
+            if self.graph.number_of_nodes() > self.num_nodes:
+                # The file names more nodes than requested: generate traffic between all of them
+                self.nodes = list(self.graph.nodes())
+                self.num_nodes = len(self.nodes)
         else:
-            # Randomly generate edges
-            edges = []
-            for i in range(self.num_nodes):
-                for j in range(i + 1, self.num_nodes):
-                    if random.random() < edge_probability:  # Generate edges with a certain probability
-                        edges.append((i, j))
-            # Adding edges to the graph
-            self.graph.add_edges_from(edges)
+            # Randomly generate edges, the cost grows with the number of edges rather than the node pairs
+            edges, positions = generate_topology(model, self.num_nodes, self.streams.get('topology', random), connected,
+                                                 edge_probability=edge_probability, **model_options)
+            if positions is not None:
+                nx.set_node_attributes(self.graph, positions, 'pos')
+                # Geometric models give each link its length, usable as TrafficSimulator(weight='length')
+                self.graph.add_weighted_edges_from(edges, weight='length')
+            else:
+                # Adding edges to the graph
+                self.graph.add_edges_from(edges)
+        self.update_topology_fingerprint(edge_array)
+
+    def update_topology_fingerprint(self, edges=None):
+        """
+        Recompute the topology hash, call after changing self.graph so stale cached paths are not reused
+
+        :param edges: integer edge array of self.graph if already at hand (e.g. from load_topology)
+        """
+        self.topology_fingerprint = topology_fingerprint(self.graph, self.weight, edges)
+        self.link_lookup = None
+        if self.path_table is not None and self.path_table.fingerprint != self.topology_fingerprint:
+            self.path_table = None
     def find_k_paths(self, source, destination, max_path):
         """
-        Find up to max_path paths from source to destination in an unweighted graph.
+        Find up to max_path loopless paths from source to destination, shortest first (Yen's algorithm).
+        Paths are ranked by hop count, or by the sum of the self.weight edge attribute when it is set.
+        Only the k paths found so far and their spur candidates are kept in memory, and ties are broken
+        by the graph's adjacency order, so the result is deterministic for a given topology.
         
-        :param graph: networkx Graph
         :param source: starting node
         :param destination: ending node
         :param max_path: maximum number of paths to find
-        :return: list of paths (each path is a list of nodes)
+        :return: list of paths (each path is a list of nodes), shared with the path cache so do not modify it
         """
         if source == destination:
             return [[source]]
         
-        queue = deque([[source]])  # Queue for BFS, storing paths
-        paths = []  # List to store found paths
-        visited = set()  # Set to track visited nodes
+        if self.path_table is not None and max_path <= self.path_table.max_path:
+            return self.path_table.get(source, destination, max_path)
+
+        key = (source, destination, max_path, self.topology_fingerprint)
+        paths = self.path_cache.get(key)
+        if paths is None:
+            with profiler.phase('path_computation'):
+                try:
+                    paths = list(islice(nx.shortest_simple_paths(self.graph, source, destination, weight=self.weight), max_path))
+                except nx.NetworkXNoPath:
+                    paths = []
+            profiler.count('path_computations')
+            profiler.count('paths_found', len(paths))
+            self.path_cache.put(key, paths)
+        return paths
+
+    def precompute_paths(self, prefix, max_path, processes=None):
+        """
+        Compute k paths for all node pairs across a process pool into a memory-mapped PathTable.
+        An existing table built on the same topology with at least max_path paths is opened instead.
+
+        :param prefix: file prefix of the table
+        :param max_path: number of paths per pair
+        :param processes: number of worker processes, None for one per CPU
+        """
+        table = None
+        if os.path.exists(prefix + '.meta.json'):
+            table = PathTable(prefix)
+            if (table.fingerprint != self.topology_fingerprint or table.weight != self.weight
+                    or table.max_path < max_path):
+                table = None
+        if table is None:
+            table = PathTable.build(self.graph, max_path, prefix, self.weight, processes)
+        self.path_table = table
+        return table
+
+    def generate_service(self):
+        """Generates one random service"""
+        rng = self.streams.get('traffic', random)
+        # Randomly select source and destination nodes
+        source, destination = rng.sample(self.nodes, 2)
+        # Randomly select service rate (10G or 100G)
+        rate = rng.choice(RATES) if rate_weights is None else rng.choices(RATES, rate_weights)[0]
         
-        while queue and len(paths) < max_path:
-            path = queue.popleft()  # Get the next path to explore
-            node = path[-1]  # Last node in the path
-            
-            if node == destination:
-                paths.append(path)  # Found a valid path
-                continue
-            
-            for neighbor in self.graph.neighbors(node):
-                if neighbor not in path:  # Prevent cycles
-                    new_path = path + [neighbor]
-                    queue.append(new_path)
-                    visited.add(neighbor)
-        return paths[:max_path]  # Return only up to max_path results
+        # Generate k possible paths for each service
+        k_paths = self.find_k_paths(source, destination, max_path)
+        return {
+            'source': source,
+            'destination': destination,
+            'rate': rate,
+            'possible_paths': k_paths
+        }
 
     def generate_services(self, num_services=300):
         """Generates a specified number of random services"""
-        services = []
+        return [self.generate_service() for _ in range(num_services)]
+
+    def generate_traffic(self, num_services=300, store=None):
+        """
+        Generates the same random services as generate_services into a compact TrafficStore whose paths are
+        shared through self.path_pool
+
+        :param store: TrafficStore to append to, None for a new one
+        """
+        if store is None:
+            store = TrafficStore(max_path, self.path_pool, num_services)
         for _ in range(num_services):
-            # Randomly select source and destination nodes
-            source, destination = random.sample(self.nodes, 2)
-            # Randomly select service rate (10G or 100G)
-            rate = random.choice(['10', '100'])
-            
-            # Generate k possible paths for each service
-            k_paths = self.find_k_paths(source, destination, max_path)
-            services.append({
-                'source': source,
-                'destination': destination,
-                'rate': rate,
-                'possible_paths': k_paths
-            })
-        #print(k_paths)
-        return services
+            service = self.generate_service()
+            store.append(service['source'], service['destination'], service['rate'], service['possible_paths'])
+        return store
 
-    def calculate_no_grooming_lightpaths(self, services):
-        """Calculate the number of light paths required without grooming"""
-        lightpaths = {}  # Record the number of lightpaths on each link
-        
-        for service in services:
-            # Use the shortest path
-            path = service['possible_paths'][0]
-            
-            # Calculate the number of lightpaths required for each link on the path
-            for i in range(len(path) - 1):
-                link = tuple(sorted([path[i], path[i+1]]))
-                if link not in lightpaths:
-                    lightpaths[link] = {
-                        '10G': 0,
-                        '100G': 0
-                    }
-                
-                # Add lightpaths based on service rate
-                rate = service['rate']
-                if rate == '10':
-                    lightpaths[link]['10G'] += 1
-                else:  # 100G
-                    lightpaths[link]['100G'] += 1
-        
-        # Calculate the total number of optical paths (one optical path for every 500G capacity)
-        total_lightpaths = 0
-        for link_load in lightpaths.values():
-            # For 10G services, one 500G optical path is required for every 50
-            lightpath_10g = (link_load['10G'] + 49) // 50
-            # For 100G services, one 500G optical path is required for every five
-            lightpath_100g = (link_load['100G'] + 4) // 5
-            total_lightpaths += lightpath_10g + lightpath_100g
-            
+    def _link_lookup(self):
+        """
+        Link keys of the topology for array lookups, format: (sorted keys, (m, 2) endpoints in key order, key base)
+        with key = smaller node * key base + larger node. The position of a key is the link index.
+        """
+        if self.link_lookup is None:
+            links = np.array(list(self.graph.edges()), dtype=np.int64).reshape(-1, 2)
+            links.sort(axis=1)
+            key_base = int(links.max()) + 1 if len(links) else 1
+            keys = links[:, 0] * key_base + links[:, 1]
+            order = np.argsort(keys)
+            self.link_lookup = (keys[order], links[order], key_base)
+        return self.link_lookup
+
+    def path_link_indices(self, paths):
+        """
+        Link indices of many non-empty paths at once
+
+        :param paths: list of paths (each path is a list of nodes)
+        :return: (int64 array of the link index of every hop, paths concatenated; int64 array of hops per path)
+        :raises KeyError: naming the first hop that is not a link of the topology
+        """
+        keys, _, key_base = self._link_lookup()
+        lengths = np.fromiter((len(path) for path in paths), dtype=np.int64, count=len(paths))
+        nodes = np.fromiter(chain.from_iterable(paths), dtype=np.int64, count=int(lengths.sum()))
+        # Hop i joins nodes[i] and nodes[i + 1], unless nodes[i] is the last node of a path
+        is_hop = np.ones(len(nodes), dtype=bool)
+        is_hop[np.cumsum(lengths) - 1] = False
+        first = nodes[:-1][is_hop[:-1]]
+        second = nodes[1:][is_hop[:-1]]
+        low, high = np.minimum(first, second), np.maximum(first, second)
+        hop_keys = low * key_base + high
+        link_ids = np.searchsorted(keys, hop_keys)
+        # A hop that is not a link (e.g. a path cached for another topology) would land on a neighbouring key
+        found = link_ids < len(keys)
+        found[found] = keys[link_ids[found]] == hop_keys[found]
+        found &= (low >= 0) & (high < key_base)
+        if not found.all():
+            hop = np.flatnonzero(~found)[0]
+            raise KeyError(f"Path hop {int(first[hop])}-{int(second[hop])} is not a link of the topology")
+        return link_ids, lengths - 1
+
+    def _least_loaded_paths(self, services, is_100, load):
+        """
+        Choose for each service the candidate path whose busiest link carries the least bandwidth, counting the
+        services chosen before it. Ties go to the shorter path.
+
+        :return: (link indices of the chosen paths concatenated, hops per chosen path)
+        """
+        candidates = [service['possible_paths'][:max_path] for service in services]
+        link_ids, hops = self.path_link_indices([path for paths in candidates for path in paths])
+        link_ids = link_ids.tolist()
+        offsets = np.concatenate(([0], np.cumsum(hops))).tolist()
+        bandwidth = (load[:, 0] * 10 + load[:, 1] * 100).tolist()  # Gb/s per link
+        chosen_ids = []
+        chosen_hops = []
+        start = 0  # Index of the first candidate path of the service
+        for paths, rate in zip(candidates, is_100.tolist()):
+            best_ids = None
+            best_peak = None
+            for candidate in range(start, start + len(paths)):
+                hop_ids = link_ids[offsets[candidate]:offsets[candidate + 1]]
+                peak = max(bandwidth[link] for link in hop_ids)
+                if best_peak is None or peak < best_peak:
+                    best_ids, best_peak = hop_ids, peak
+            start += len(paths)
+            for link in best_ids:
+                bandwidth[link] += 100 if rate else 10
+            chosen_ids.extend(best_ids)
+            chosen_hops.append(len(best_ids))
+        return np.array(chosen_ids, dtype=np.int64), np.array(chosen_hops, dtype=np.int64)
+
+    def calculate_no_grooming_lightpaths(self, services, lightpaths=None, policy='shortest'):
+        """
+        Calculate the number of light paths required without grooming. All services are counted at once: their
+        paths become arrays of link indices and the 10G/100G services per link are counted with one bincount.
+
+        :param services: list of services or a TrafficStore, services without any path are skipped
+        :param lightpaths: per-link loads of earlier services to add to (updated in place), None to start empty
+        :param policy: path of each service, 'shortest' (first path) or 'least_loaded' (of the k paths)
+        :return: (total number of lightpaths, per-link loads {(node1, node2): {'10G': count, '100G': count}})
+        """
+        if lightpaths is None:
+            lightpaths = {}  # Record the number of lightpaths on each link
+        _, links, _ = self._link_lookup()
+        store = None
+        if isinstance(services, TrafficStore):
+            if policy == 'shortest':
+                store = services
+            else:
+                services = list(services)  # The least loaded choice goes through the services one by one anyway
+        if store is None:
+            services = [service for service in services if service['possible_paths']]
+
+        # Services per link, column 0 = 10G, column 1 = 100G, starting from the earlier loads
+        load = np.zeros((len(links), 2), dtype=np.int64)
+        if lightpaths:
+            earlier_ids, _ = self.path_link_indices(list(lightpaths))
+            load[earlier_ids] = [[link_load['10G'], link_load['100G']] for link_load in lightpaths.values()]
+
+        if store is not None:
+            # Link indices of every distinct path once, then gathered for the services using it
+            data = store.data[store.data['candidates'][:, 0] >= 0]
+            pool_links, pool_hops = self.path_link_indices(store.pool.paths)
+            positions, hops = segment_positions(np.concatenate(([0], np.cumsum(pool_hops))),
+                                                data['candidates'][:, 0].astype(np.int64))
+            link_ids = pool_links[positions]
+            is_100 = data['rate'].astype(np.int64)
+        else:
+            is_100 = np.fromiter((service['rate'] != '10' for service in services), dtype=np.int64, count=len(services))
+            if policy == 'shortest':
+                link_ids, hops = self.path_link_indices([service['possible_paths'][0] for service in services])
+            elif policy == 'least_loaded':
+                link_ids, hops = self._least_loaded_paths(services, is_100, load)
+            else:
+                raise ValueError(f"Unknown no-grooming policy {policy!r}, expected one of {NO_GROOMING_POLICIES}")
+        load += np.bincount(link_ids * 2 + np.repeat(is_100, hops), minlength=2 * len(links)).reshape(-1, 2)
+
+        # One lightpath per LIGHTPATH_CAPACITY // 10 10G services and per LIGHTPATH_CAPACITY // 100 100G services
+        # (50 and 5 for 500G lightpaths), the limits are read at call time so OTH_en can be reconfigured
+        per_10, per_100 = OTH_en.LIGHTPATH_CAPACITY // 10, OTH_en.LIGHTPATH_CAPACITY // 100
+        total_lightpaths = int(((load[:, 0] + per_10 - 1) // per_10 + (load[:, 1] + per_100 - 1) // per_100).sum())
+
+        used = np.flatnonzero(load.any(axis=1))
+        for (node1, node2), (count_10g, count_100g) in zip(links[used].tolist(), load[used].tolist()):
+            lightpaths[(node1, node2)] = {'10G': count_10g, '100G': count_100g}
         return total_lightpaths, lightpaths
 
-def plot_results(results):
-    import matplotlib.pyplot as plt
+def build_network(simulator):
+    """Create an empty Network with the nodes and links of the simulator topology"""
+    network = Network()
+    for node in simulator.nodes:
+        network.add_node(node)
+    for edge in simulator.graph.edges():
+        network.add_connection(edge[0], edge[1])
+    return network
+
+def select_candidate(evaluations, policy=None, rng=None):
+    """
+    Pick a path among the results of Network.evaluate_candidates: the first feasible one, or with the
+    'capacity_aware' routing policy the feasible one adding the fewest WDMs (shortest first on ties).
+
+    :param policy: one of ROUTING_POLICIES, default routing_policy
+    :param rng: random generator breaking 'capacity_aware' ties uniformly at random instead of shortest first
+    :return: the chosen evaluation, or None if no candidate fits
+    """
+    capacity_aware = (policy or routing_policy) == 'capacity_aware'
+    chosen = None
+    ties = 0  # Feasible candidates seen with the cost of chosen
+    for evaluation in evaluations:
+        if not evaluation['fits']:
+            continue
+        if chosen is None or (capacity_aware and evaluation['wdm_delta'] < chosen['wdm_delta']):
+            chosen = evaluation
+            ties = 1
+        elif capacity_aware and rng is not None and evaluation['wdm_delta'] == chosen['wdm_delta']:
+            # Reservoir sampling keeps each tied candidate with equal probability
+            ties += 1
+            if rng.randrange(ties) == 0:
+                chosen = evaluation
+    return chosen
 
-def plot_results(results):
-    # Extracting data
-    num_services = [entry['num_services'] for entry in results]
-    no_grooming_lightpaths = [entry['no_grooming_lightpaths'] for entry in results]
-    grooming_lightpaths = [entry['grooming_lightpaths'] for entry in results]
-    blocked_percentage = [entry['blocked_percentage'] for entry in results]
+def groom_service(network, service, rng=None):
+    """
+    Admit a service on one of its candidate paths, return the admitted entry or None if blocked.
+    All candidates are checked at once with Network.evaluate_candidates and chosen by select_candidate
+    (rng breaks ties, see there).
+    """
+    profiler.count('services')
+    odu_size = service['rate']
+    evaluations = network.evaluate_candidates({'odu_size': odu_size}, service['possible_paths'][:max_path])
+    profiler.count('candidates_evaluated', len(evaluations))
+    for evaluation in evaluations:
+        if not evaluation['fits']:
+            # A rejected candidate is the retry an admit-and-roll-back loop would have paid for
+            profiler.count('candidates_rejected')
+            profiler.count('violations_' + evaluation['violation'])
+    chosen = select_candidate(evaluations, rng=rng)
+    if chosen is None:
+        profiler.count('blocked')
+        return None
+    grooming_service = {
+        'odu_size': odu_size,
+        'path': chosen['path']
+    }
+    (can_use, wdm_count) = network.admit(grooming_service)
+    profiler.count('admission_attempts')
+    if(can_use == 1):
+        return grooming_service
+    # Not reached while evaluate_candidates and admit agree
+    profiler.count('violations_' + network.last_violation)
+    profiler.count('blocked')
+    return None
+
+def groom_traffic(network, store, verbose=False, rng=None):
+    """
+    Admit the services of a TrafficStore one at a time with groom_service and record their chosen paths in the
+    store (-1 for blocked). Return the number of blocked services.
+    """
+    blocked_services = 0
+    for index in range(len(store)):
+        grooming_service = groom_service(network, store.service(index), rng)
+        store.set_path(index, grooming_service['path'] if grooming_service is not None else None)
+        if grooming_service is None:
+            blocked_services += 1
+            if verbose:
+                print("Blocked+1")
+    return blocked_services
+
+def run_load_level(simulator, num_services, verbose=True):
+    """
+    Generate num_services random services and admit them with and without grooming.
+
+    :param simulator: TrafficSimulator with its network topology created
+    :param num_services: number of services offered at this load level
+    :param verbose: print the per-level results
+    :return: result record {'num_services', 'no_grooming_lightpaths', 'grooming_lightpaths', 'blocked_percentage'},
+             plus 'aux_graph_lightpaths' and 'aux_graph_blocked_percentage' if aux_graph_comparison is set
+    """
+    # Generate Service
+    services = simulator.generate_traffic(num_services)
     
-    # Calculate Savings Ratio
-    savings_ratio = [(ng - g) / ng if ng != 0 else 0 for ng, g in zip(no_grooming_lightpaths, grooming_lightpaths)]
+    # Calculation without grooming
+    with profiler.phase('no_grooming'):
+        no_grooming_lightpaths, link_details = simulator.calculate_no_grooming_lightpaths(services, policy=no_grooming_policy)
     
-    # Create multiple windows and display them simultaneously
-    fig1 = plt.figure()
-    plt.plot(num_services, no_grooming_lightpaths, marker='o', linestyle='-', color='b', label='No Grooming')
-    plt.plot(num_services, grooming_lightpaths, marker='s', linestyle='-', color='g', label='Grooming')
-    plt.xlabel('Number of Services')
-    plt.ylabel('Lightpaths')
-    plt.title('No Grooming vs Grooming Lightpaths')
-    plt.legend()
-    plt.grid(True)
+    # Processing Services: one long-lived network per load level, services are admitted one at a time
+    with profiler.phase('admission'):
+        network = build_network(simulator)
+        blocked_services = groom_traffic(network, services, verbose, simulator.streams.get('tie_breaking'))
+    # The WDM count is kept up to date by every admit, so this phase only covers reading it out
+    with profiler.phase('wdm_counting'):
+        grooming_lightpaths = network.wdm_count
     
-    fig2 = plt.figure()
-    plt.plot(num_services, savings_ratio, marker='d', linestyle='-', color='m')
-    plt.xlabel('Number of Services')
-    plt.ylabel('Savings Ratio')
-    plt.title('Savings Ratio (Grooming vs No Grooming)')
-    plt.grid(True)
+    # Calculate the blocked ratio
+    blocked_percentage = blocked_services / num_services
+    result = {
+        'num_services': num_services,
+        'no_grooming_lightpaths': no_grooming_lightpaths,
+        'grooming_lightpaths': grooming_lightpaths,
+        'blocked_percentage': blocked_percentage
+    }
+
+    # Same services groomed by the auxiliary-graph engine on a network of their own
+    if aux_graph_comparison:
+        with profiler.phase('aux_graph'):
+            aux_network = build_network(simulator)
+            engine = AuxiliaryGraphEngine(aux_network, simulator.graph)
+            aux_blocked_services = sum(1 for service in services if engine.groom(service) is None)
+        result['aux_graph_lightpaths'] = aux_network.wdm_count
+        result['aux_graph_blocked_percentage'] = aux_blocked_services / num_services
     
-    fig3 = plt.figure()
-    plt.plot(num_services, blocked_percentage, marker='^', linestyle='-', color='r')
-    plt.xlabel('Number of Services')
-    plt.ylabel('Blocked Percentage')
-    plt.title('Number of Services vs Blocked Percentage')
-    plt.grid(True)
+    if verbose:
+        # Output current result
+        print(f"Number of lightpaths without grooming: {no_grooming_lightpaths}")
+        print(f"Number of lightpaths with grooming: {grooming_lightpaths}")
+        print(f"Save the number of lightpaths: {no_grooming_lightpaths - grooming_lightpaths}")
+        print(f"Blocked service ratio: {blocked_percentage:.2%}")
+        print_aux_graph_result(result)
     
-    # Shwo
-    plt.show()
+    return result
 
-def main():
-    # Creating a Simulation Instance
-    simulator = TrafficSimulator(nbOfNode)  # Nodes of the network
-    simulator.create_network()  # Create a network topology
-    
-    # Initialization results
+def print_aux_graph_result(result):
+    """Print the auxiliary-graph engine figures of a result record, if it has them"""
+    if 'aux_graph_lightpaths' in result:
+        print(f"Number of lightpaths with auxiliary-graph grooming: {result['aux_graph_lightpaths']} "
+              f"(saves {result['no_grooming_lightpaths'] - result['aux_graph_lightpaths']}, "
+              f"{result['grooming_lightpaths'] - result['aux_graph_lightpaths']} fewer than the k-path heuristic, "
+              f"blocked {result['aux_graph_blocked_percentage']:.2%})")
+
+def run_sweep(simulator, num_services=30, step=10, max_blocking=0.01, verbose=True, sink=None,
+              checkpoint_file=None, resume_state=None):
+    """
+    Increase the load by step services per level until the blocking rate reaches max_blocking.
+
+    :param simulator: TrafficSimulator with its network topology created
+    :param num_services: starting number of services
+    :param step: services added per level
+    :param max_blocking: blocking rate that ends the sweep
+    :param verbose: print the per-level results
+    :param sink: ResultSink each level's record is appended to as soon as it is computed, holding one record per
+                 completed level (a resumed sweep cuts it back to the levels of its snapshot)
+    :param checkpoint_file: snapshot the sweep here after every completed level
+    :param resume_state: state loaded from such a snapshot, the sweep continues after its last completed level
+    :return: list of result records, one per load level
+    """
     results = []
-    num_services = 30  # Starting Serving Quantity
     blocked_percentage = 0
+    if resume_state is not None:
+        results = resume_state['results']
+        num_services = resume_state['num_services']
+        blocked_percentage = resume_state['blocked_percentage']
+        random.setstate(resume_state['random_state'])
+        if sink is not None:
+            sink.truncate(len(results))  # Levels written after the snapshot are computed again
     
-    while blocked_percentage < 0.01:  # Until 0.01% of the traffic is blocked
-        print(f"\nNumber of testing services: {num_services}")
-        
-        # Generate Service
-        services = simulator.generate_services(num_services)
-        
-        # Calculation without grooming
-        no_grooming_lightpaths, link_details = simulator.calculate_no_grooming_lightpaths(services)
+    while blocked_percentage < max_blocking:  # Until 1% of the traffic is blocked
+        if verbose:
+            print(f"\nNumber of testing services: {num_services}")
+        result = run_load_level(simulator, num_services, verbose)
+        results.append(result)
+        if sink is not None:
+            sink.write(result)
+        profiler.checkpoint(num_services=num_services)
+        blocked_percentage = result['blocked_percentage']
         
+        # Increase the number of services
+        num_services += step
+        if checkpoint_file:
+            save_checkpoint(checkpoint_file, {
+                'sweep': 'regenerate',
+                'simulator': simulator,
+                'results': results,
+                'num_services': num_services,
+                'blocked_percentage': blocked_percentage,
+                'random_state': random.getstate()
+            })
+    return results
 
+def run_incremental_sweep(simulator, num_services=30, step=10, max_blocking=0.01, verbose=True, sink=None,
+                          checkpoint_file=None, resume_state=None):
+    """
+    Same as run_sweep, but each level extends the traffic of the previous one: only the step new services are
+    generated and admitted on the network state kept from the previous level, so the traffic sets are nested.
+    The blocking rate of a level counts all services offered up to it.
 
-        # Processing Services
-        grooming_services = []
-        previce_services = []
-        blocked_services = 0
-        for service in services:
-            for path_number in range(max_path):
-                # Use the existing Network class to calculate grooming situations
-                network = Network()
-                
-                # Adding nodes and connections
-                for node in simulator.nodes:
-                    network.add_node(node)
-                for edge in simulator.graph.edges():
-                    network.add_connection(edge[0], edge[1])
-
-                previce_services = grooming_services
-                grooming_services.append({
-                    'odu_size': service['rate'],
-                    'path': service['possible_paths'][path_number]
-                })
-                
-                (can_use, wdm_count) = network.run_network(grooming_services)
-                #print(grooming_services)
-                if(can_use == 0):
-                    if(path_number + 1 >= max_path):
-                        #print(f"Blocked{grooming_services}")
-                        grooming_services.remove({
-                            'odu_size': service['rate'],
-                            'path': service['possible_paths'][path_number]
-                        })
-                        #print(f"Deleted{grooming_services}")
-
-                        blocked_services += 1
-                        print("Blocked+1")
-                        path_number = 0
-                        break
-                    else:
-                        # print(f"Switch to Link {path_number+1}")
-                        grooming_services.remove({
-                            'odu_size': service['rate'],
-                            'path': service['possible_paths'][path_number]
-                        })
-                else:
-                    #print(f"Link {path_number} pass")
-                    break
-            grooming_lightpaths = wdm_count
-        
-        # Calculate the blocked ratio
-        blocked_percentage = blocked_services / num_services
-        
-        # Calculate the number of light paths with grooming
-        #grooming_lightpaths = network.calculate_wdm_count()
-        
-        # Recording Results
-        results.append({
-            'num_services': num_services,
+    :return: list of result records, one per load level
+    """
+    results = []
+    network = build_network(simulator) if resume_state is None else None
+    aux_network = build_network(simulator) if aux_graph_comparison and resume_state is None else None
+    aux_blocked_services = 0
+    no_grooming_links = {}  # Per-link loads without grooming, extended level by level
+    offered_services = 0
+    blocked_services = 0
+    blocked_percentage = 0
+    new_services = num_services
+    if resume_state is not None:
+        results = resume_state['results']
+        network = resume_state['network']
+        aux_network = resume_state.get('aux_network')
+        aux_blocked_services = resume_state.get('aux_blocked_services', 0)
+        no_grooming_links = resume_state['no_grooming_links']
+        offered_services = resume_state['offered_services']
+        blocked_services = resume_state['blocked_services']
+        blocked_percentage = resume_state['blocked_percentage']
+        new_services = step
+        random.setstate(resume_state['random_state'])
+        if sink is not None:
+            sink.truncate(len(results))  # Levels written after the snapshot are computed again
+    engine = AuxiliaryGraphEngine(aux_network, simulator.graph) if aux_network is not None else None
+
+    while blocked_percentage < max_blocking:
+        if verbose:
+            print(f"\nNumber of testing services: {offered_services + new_services}")
+        services = simulator.generate_traffic(new_services)
+        with profiler.phase('no_grooming'):
+            no_grooming_lightpaths, no_grooming_links = simulator.calculate_no_grooming_lightpaths(
+                services, no_grooming_links, no_grooming_policy)
+        with profiler.phase('admission'):
+            blocked_services += groom_traffic(network, services, verbose, simulator.streams.get('tie_breaking'))
+        offered_services += new_services
+        blocked_percentage = blocked_services / offered_services
+
+        with profiler.phase('wdm_counting'):
+            grooming_lightpaths = network.wdm_count
+        result = {
+            'num_services': offered_services,
             'no_grooming_lightpaths': no_grooming_lightpaths,
             'grooming_lightpaths': grooming_lightpaths,
             'blocked_percentage': blocked_percentage
-        })
-        
-        # Output current result
-        print(f"Number of lightpaths without grooming: {no_grooming_lightpaths}")
-        print(f"Number of lightpaths with grooming: {grooming_lightpaths}")
-        print(f"Save the number of lightpaths: {no_grooming_lightpaths - grooming_lightpaths}")
-        print(f"Blocked service ratio: {blocked_percentage:.2%}")
-        
-        # Increase the number of services
-        num_services += 10
+        }
+        if engine is not None:
+            with profiler.phase('aux_graph'):
+                aux_blocked_services += sum(1 for service in services if engine.groom(service) is None)
+            result['aux_graph_lightpaths'] = aux_network.wdm_count
+            result['aux_graph_blocked_percentage'] = aux_blocked_services / offered_services
+        results.append(result)
+        if sink is not None:
+            sink.write(result)
+        profiler.checkpoint(num_services=offered_services)
+        if verbose:
+            print(f"Number of lightpaths without grooming: {result['no_grooming_lightpaths']}")
+            print(f"Number of lightpaths with grooming: {result['grooming_lightpaths']}")
+            print(f"Save the number of lightpaths: {result['no_grooming_lightpaths'] - result['grooming_lightpaths']}")
+            print(f"Blocked service ratio: {blocked_percentage:.2%}")
+            print_aux_graph_result(result)
+        new_services = step
+        if checkpoint_file:
+            save_checkpoint(checkpoint_file, {
+                'sweep': 'incremental',
+                'simulator': simulator,
+                'results': results,
+                'network': network,
+                'aux_network': aux_network,
+                'aux_blocked_services': aux_blocked_services,
+                'no_grooming_links': no_grooming_links,
+                'offered_services': offered_services,
+                'blocked_services': blocked_services,
+                'blocked_percentage': blocked_percentage,
+                'random_state': random.getstate()
+            })
+    return results
+
+def main(argv=None):
+    global nbOfNode, path_cache_file, path_table_prefix, incremental_sweep, profile_file
+    global results_file, plot_dir, show_plots, checkpoint_file, no_grooming_policy, routing_policy
+    global aux_graph_comparison
+    parser = argparse.ArgumentParser(description='Grooming vs no-grooming load sweep')
+    parser.add_argument('--nodes', type=int, default=nbOfNode, help='number of nodes')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed the topology and traffic streams, so runs (and their cached paths) are reproducible')
+    parser.add_argument('--antithetic', action='store_true', help='with --seed, draw the traffic antithetically')
+    parser.add_argument('--topology', default=None,
+                        help='read the topology from this file (edge list, .npy, .gml, .graphml or node-link .json)')
+    parser.add_argument('--model', choices=MODELS, default='erdos_renyi', help='random topology model')
+    parser.add_argument('--edge-probability', type=float, default=0.5, help='edge probability of the erdos_renyi model')
+    parser.add_argument('--incremental', action='store_true', default=incremental_sweep,
+                        help='each load level extends the traffic of the previous one')
+    parser.add_argument('--path-cache', default=path_cache_file, help='k-path cache file loaded and saved between runs')
+    parser.add_argument('--path-table', default=path_table_prefix, help='prefix of a precomputed all-pairs path table')
+    parser.add_argument('--profile', default=profile_file, help='per-level timings and counters file (.json or .csv)')
+    parser.add_argument('--results', default=results_file, help='append each level to this file (.csv, .jsonl, .parquet)')
+    parser.add_argument('--plot-dir', default=plot_dir, help='write the figures to this directory instead of showing them')
+    parser.add_argument('--headless', action='store_true', default=not show_plots, help='do not plot')
+    parser.add_argument('--checkpoint', default=checkpoint_file, help='snapshot the sweep to this file after every level')
+    parser.add_argument('--resume', action='store_true', help='continue from the --checkpoint file if it exists')
+    parser.add_argument('--baseline', choices=NO_GROOMING_POLICIES, default=no_grooming_policy,
+                        help='path choice of the no-grooming baseline')
+    parser.add_argument('--routing', choices=ROUTING_POLICIES, default=routing_policy,
+                        help='order in which the k paths are tried when grooming')
+    parser.add_argument('--aux-graph', action='store_true', default=aux_graph_comparison,
+                        help='also groom each level with the auxiliary-graph engine and report its savings')
+    args = parser.parse_args(argv)
+    nbOfNode = args.nodes
+    incremental_sweep = args.incremental
+    path_cache_file = args.path_cache
+    path_table_prefix = args.path_table
+    profile_file = args.profile
+    results_file = args.results
+    plot_dir = args.plot_dir
+    show_plots = not args.headless
+    checkpoint_file = args.checkpoint
+    no_grooming_policy = args.baseline
+    routing_policy = args.routing
+    aux_graph_comparison = args.aux_graph
+    if args.resume and not checkpoint_file:
+        parser.error('--resume needs --checkpoint')
+    if args.antithetic and args.seed is None:
+        parser.error('--antithetic needs --seed')
+
+    # Creating a Simulation Instance
+    if profile_file:
+        profiler.enabled = True
+    resume_state = None
+    if args.resume and os.path.exists(checkpoint_file):
+        resume_state = load_checkpoint(checkpoint_file)
+        incremental_sweep = resume_state['sweep'] == 'incremental'
+        simulator = resume_state['simulator']
+        print(f"Resuming after {len(resume_state['results'])} completed load levels")
+    else:
+        simulator = TrafficSimulator(nbOfNode)  # Nodes of the network
+        if args.seed is not None:
+            random.seed(args.seed)
+            simulator.seed_streams(args.seed, ('topology', 'traffic'), args.antithetic)
+        with profiler.phase('topology'):
+            # Create a network topology
+            simulator.create_network(args.topology, args.edge_probability, args.model)
+    if path_table_prefix:
+        simulator.precompute_paths(path_table_prefix, max_path)
+    if path_cache_file and os.path.exists(path_cache_file):
+        simulator.path_cache.load(path_cache_file)
+    
+    # A resumed run continues the results file of the interrupted one, a new run starts it over
+    sink = ResultSink(results_file, append=resume_state is not None) if results_file else None
+    try:
+        if incremental_sweep:
+            results = run_incremental_sweep(simulator, sink=sink, checkpoint_file=checkpoint_file,
+                                            resume_state=resume_state)
+        else:
+            results = run_sweep(simulator, sink=sink, checkpoint_file=checkpoint_file, resume_state=resume_state)
+    finally:
+        if sink is not None:
+            sink.close()
     
     # Print the final result
     print("\nFinal simulation results:")
@@ -266,9 +719,19 @@ def main():
         print(f"Number of lightpaths with grooming: {result['grooming_lightpaths']}")
         print(f"Savings ratio: {(result['no_grooming_lightpaths'] - result['grooming_lightpaths']) / result['no_grooming_lightpaths']:.2%}")
         print(f"Blocking rate: {result['blocked_percentage']:.2%}")
+        print_aux_graph_result(result)
+    cache_stats = simulator.path_cache.stats()
+    print(f"\nPath cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.2%})")
+    if path_cache_file:
+        simulator.path_cache.save(path_cache_file)
     # Plot
-    plot_results(results)
+    if show_plots or plot_dir:
+        with profiler.phase('plotting'):
+            plot_results(results, plot_dir)
+    if profile_file:
+        profiler.checkpoint(num_services=None)
+        profiler.write(profile_file)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,316 @@
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import socketserver
+import threading
+
+import R_en
+from R_en import TrafficSimulator, build_network, select_candidate
+from checkpoint import load_checkpoint, save_checkpoint
+from traffic import RATES
+
+
+class AdmissionState:
+    """
+    A loaded network kept in memory with its admitted services, answering admission requests. Requests are dicts
+    with an 'op' entry and the replies are dicts, so they map one to one onto JSON lines:
+    - query: {'source', 'destination', 'rate'} or {'paths', 'rate'}, can the service be groomed and at what
+      lightpath cost -> {'fits', 'path', 'wdm_delta', 'violation'} (the state is not changed)
+    - evaluate: same request -> {'candidates': Network.evaluate_candidates entries}
+    - admit: same request -> {'fits', 'id', 'path', 'wdm_delta'}, the id is needed to release the service
+    - release: {'id'} -> {'released', 'wdm_count'}
+    - status: {} -> {'services', 'wdm_count', 'nodes', 'links'}
+    - snapshot: {} -> {'snapshot': file name}
+    Every reply to a bad request is {'error': message}. The rate defaults to '100', candidate paths to the
+    R_en.max_path shortest paths of the topology (paths given by the client must be simple paths of the topology
+    between the same end points) and the optional 'policy' to R_en.routing_policy.
+    """
+
+    def __init__(self, simulator, network=None, services=None, snapshot_file=None, snapshot_every=None):
+        """
+        :param simulator: TrafficSimulator with its network topology created
+        :param network: Network loaded through admit, None for an empty one
+        :param services: {id: admitted {'odu_size', 'path'} entry} of the services in network
+        :param snapshot_file: file the state is snapshotted to (see load)
+        :param snapshot_every: admits and releases between automatic snapshots, None for snapshots on request only
+        """
+        self.simulator = simulator
+        self.network = network if network is not None else build_network(simulator)
+        self.services = services if services is not None else {}
+        self.next_id = max(self.services, default=-1) + 1
+        self.snapshot_file = snapshot_file
+        self.snapshot_every = snapshot_every
+        self.changes = 0  # Admits and releases since the last snapshot
+        self.lock = threading.Lock()  # Requests of concurrent connections are applied one at a time
+        self.operations = {
+            'query': self.query,
+            'evaluate': self.evaluate,
+            'admit': self.admit,
+            'release': self.release,
+            'status': self.status,
+            'snapshot': self.snapshot
+        }
+
+    @classmethod
+    def load(cls, snapshot_file, snapshot_every=None):
+        """Restart from a snapshot written by snapshot(), k-paths are recomputed on demand"""
+        state = load_checkpoint(snapshot_file)
+        return cls(state['simulator'], state['network'], state['services'], snapshot_file, snapshot_every)
+
+    def handle(self, request):
+        """Apply one request dict or a batch (list) of them, return the reply or the list of replies"""
+        with self.lock:
+            if isinstance(request, list):
+                return [self._handle(entry) for entry in request]
+            return self._handle(request)
+
+    def _handle(self, request):
+        try:
+            operation = self.operations.get(request.get('op')) if isinstance(request, dict) else None
+            if operation is None:
+                raise ValueError(f"Unknown request {request!r}, expected an 'op' in {sorted(self.operations)}")
+            return operation(request)
+        except (ValueError, KeyError, TypeError) as error:
+            return {'error': str(error)}
+
+    def _candidates(self, request):
+        """(ODU size, candidate paths, routing policy) of a query, evaluate or admit request"""
+        odu_size = str(request.get('rate', '100'))
+        if odu_size not in RATES:
+            raise ValueError(f"Unknown rate {odu_size!r}, expected one of {RATES}")
+        policy = request.get('policy')
+        if policy is not None and policy not in R_en.ROUTING_POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {R_en.ROUTING_POLICIES}")
+        graph = self.simulator.graph
+        if 'paths' in request:
+            paths = request['paths']
+            if not isinstance(paths, list) or not paths or \
+                    not all(isinstance(path, list) and len(path) >= 2 for path in paths):
+                raise ValueError('paths must be a non-empty list of paths of at least two nodes')
+            source = request.get('source', paths[0][0])
+            destination = request.get('destination', paths[0][-1])
+            for path in paths:
+                self._check_path(path, source, destination)
+        else:
+            source, destination = request['source'], request['destination']
+            for node in (source, destination):
+                if node not in graph:
+                    raise ValueError(f"Unknown node {node!r}")
+            paths = self.simulator.find_k_paths(source, destination, R_en.max_path)
+        return odu_size, paths, policy
+
+    def _check_path(self, path, source, destination):
+        """Raise ValueError unless path is a simple path of the topology from source to destination"""
+        graph = self.simulator.graph
+        if path[0] != source or path[-1] != destination:
+            raise ValueError(f"Path {path!r} does not run from {source!r} to {destination!r}")
+        for node in path:
+            if node not in graph:
+                raise ValueError(f"Unknown node {node!r} in path {path!r}")
+        if len(set(path)) != len(path):
+            raise ValueError(f"Path {path!r} visits a node twice")
+        for node1, node2 in zip(path, path[1:]):
+            if not graph.has_edge(node1, node2):
+                raise ValueError(f"Path {path!r} uses {node1!r}-{node2!r}, which is not a link")
+
+    def _choose(self, request):
+        """(ODU size, evaluations of the candidate paths, chosen evaluation or None), shared by query and admit"""
+        odu_size, paths, policy = self._candidates(request)
+        evaluations = self.network.evaluate_candidates({'odu_size': odu_size}, paths)
+        return odu_size, evaluations, select_candidate(evaluations, policy)
+
+    def query(self, request):
+        _, evaluations, chosen = self._choose(request)
+        if chosen is None:
+            # Report the violation of the first candidate, the one a first fit would have used
+            return {'fits': False, 'path': None, 'wdm_delta': None,
+                    'violation': evaluations[0]['violation'] if evaluations else 'no_path'}
+        return {'fits': True, 'path': chosen['path'], 'wdm_delta': chosen['wdm_delta'], 'violation': None}
+
+    def evaluate(self, request):
+        odu_size, paths, _ = self._candidates(request)
+        return {'candidates': self.network.evaluate_candidates({'odu_size': odu_size}, paths)}
+
+    def admit(self, request):
+        # Admits the path query reports for the same request, evaluate_candidates agrees with Network.admit
+        odu_size, _, chosen = self._choose(request)
+        if chosen is None:
+            return {'fits': False, 'id': None, 'path': None, 'wdm_delta': None}
+        grooming_service = {
+            'odu_size': odu_size,
+            'path': chosen['path']
+        }
+        can_use, _ = self.network.admit(grooming_service)
+        if can_use != 1:
+            return {'fits': False, 'id': None, 'path': None, 'wdm_delta': None}
+        service_id = self.next_id
+        self.next_id += 1
+        self.services[service_id] = grooming_service
+        self._changed()
+        return {'fits': True, 'id': service_id, 'path': grooming_service['path'], 'wdm_delta': chosen['wdm_delta']}
+
+    def release(self, request):
+        grooming_service = self.services.pop(request['id'], None)
+        if grooming_service is None:
+            raise ValueError(f"Unknown service id {request['id']!r}")
+        wdm_count = self.network.release(grooming_service)
+        self._changed()
+        return {'released': True, 'wdm_count': wdm_count}
+
+    def status(self, request=None):
+        return {'services': len(self.services), 'wdm_count': self.network.wdm_count,
+                'nodes': self.simulator.graph.number_of_nodes(), 'links': self.simulator.graph.number_of_edges()}
+
+    def snapshot(self, request=None):
+        """Write the simulator, network and admitted services to snapshot_file"""
+        if not self.snapshot_file:
+            raise ValueError('No snapshot file configured')
+        save_checkpoint(self.snapshot_file, {'simulator': self.simulator, 'network': self.network,
+                                             'services': self.services})
+        self.changes = 0
+        return {'snapshot': self.snapshot_file}
+
+    def _changed(self):
+        self.changes += 1
+        if self.snapshot_every and self.changes >= self.snapshot_every:
+            self.snapshot()
+
+
+class AdmissionHandler(socketserver.StreamRequestHandler):
+    """One connection: a JSON request (or batch list) per line in, one JSON reply per line out, in order"""
+
+    def setup(self):
+        super().setup()
+        if self.connection.family in (socket.AF_INET, socket.AF_INET6):
+            # Small replies must not wait for Nagle's algorithm, it would add tens of milliseconds per request
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = self.server.state.handle(json.loads(line))
+            except json.JSONDecodeError as error:
+                reply = {'error': f"Invalid JSON: {error}"}
+            self.wfile.write(json.dumps(reply).encode() + b'\n')
+
+
+class AdmissionTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class AdmissionUnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+def serve(state, address):
+    """
+    Serve an AdmissionState until interrupted, then snapshot it if a snapshot file is set.
+
+    :param address: (host, port) for TCP or the path of a Unix socket
+    """
+    if isinstance(address, tuple):
+        server = AdmissionTCPServer(address, AdmissionHandler)
+    else:
+        if os.path.exists(address):
+            os.remove(address)  # Left over by a previous run
+        server = AdmissionUnixServer(address, AdmissionHandler)
+    server.state = state
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if state.snapshot_file:
+                with state.lock:
+                    state.snapshot()
+
+
+class AdmissionClient:
+    """Client of a running admission service, keeping one connection open"""
+
+    def __init__(self, address):
+        """:param address: (host, port) or the path of a Unix socket"""
+        if isinstance(address, tuple):
+            self.socket = socket.create_connection(address)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(address)
+        self.file = self.socket.makefile('rwb')
+
+    def request(self, op, **fields):
+        """Send one request and return its reply dict"""
+        return self.batch({'op': op, **fields})
+
+    def batch(self, requests):
+        """Send a request dict or a list of them in one round trip, return the reply or the list of replies"""
+        self.file.write(json.dumps(requests).encode() + b'\n')
+        self.file.flush()
+        return json.loads(self.file.readline())
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+
+def preload(state, services):
+    """
+    Admit generated services through the request handler, so a service without candidate paths (disconnected
+    topology) is refused like any invalid request instead of stopping the service
+
+    :return: number of services admitted
+    """
+    replies = [state.handle({'op': 'admit', 'rate': service['rate'], 'paths': service['possible_paths']})
+               for service in services]
+    return sum(1 for reply in replies if reply.get('fits'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resident admission query service over a loaded network')
+    parser.add_argument('--nodes', type=int, default=R_en.nbOfNode, help='number of nodes')
+    parser.add_argument('--edge-probability', type=float, default=0.5, help='edge probability of the topology')
+    parser.add_argument('--topology', default=None, help='read the topology from this edge list file instead')
+    parser.add_argument('--services', type=int, default=0, help='random services groomed before serving')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--path-table', default=None, help='prefix of a precomputed all-pairs path table')
+    parser.add_argument('--snapshot', default=None, help='snapshot file, loaded on start if it exists')
+    parser.add_argument('--snapshot-every', type=int, default=1000, help='admits and releases between snapshots')
+    parser.add_argument('--host', default='127.0.0.1', help='TCP address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port to listen on')
+    parser.add_argument('--socket', default=None, help='listen on this Unix socket instead of TCP')
+    args = parser.parse_args()
+
+    if args.snapshot and os.path.exists(args.snapshot):
+        state = AdmissionState.load(args.snapshot, args.snapshot_every)
+        print(f"Loaded {len(state.services)} services from {args.snapshot}")
+    else:
+        random.seed(args.seed)
+        simulator = TrafficSimulator(args.nodes)
+        simulator.create_network(args.topology, edge_probability=args.edge_probability)
+        state = AdmissionState(simulator, snapshot_file=args.snapshot)
+        admitted = preload(state, simulator.generate_services(args.services))
+        print(f"Preloaded {admitted} of {args.services} services")
+        state.snapshot_every = args.snapshot_every
+        if args.snapshot:
+            state.snapshot()
+    if args.path_table:
+        state.simulator.precompute_paths(args.path_table, R_en.max_path)
+    status = state.status()
+    print(f"{status['services']} services on {status['wdm_count']} WDMs, "
+          f"{status['nodes']} nodes and {status['links']} links")
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # Snapshot on termination as on Ctrl-C
+    address = args.socket or (args.host, args.port)
+    print(f"Serving on {address}")
+    serve(state, address)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import R_en
+from R_en import TrafficSimulator, build_network, run_load_level
+
+# (nodes, services) per benchmark scale
+SCALES = [(50, 100), (100, 1000), (500, 5000), (1000, 10000)]
+AVERAGE_DEGREE = 8  # Expected node degree of the benchmark topologies, the default p=0.5 is far too dense at scale
+PATH_SAMPLES = 200  # Node pairs timed by the find_k_paths benchmark
+
+
+def best_time(function, repeats):
+    """Return the fastest of repeats runs, function times its own measured part and returns the seconds"""
+    return min(function() for _ in range(repeats))
+
+
+def timed(function, *args):
+    """Call function and return its elapsed wall time"""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def bench_scale(num_nodes, num_services, repeats=3, seed=0):
+    """
+    Time the simulator hot paths at one scale.
+
+    :return: {benchmark name: best wall time in seconds}
+    """
+    edge_probability = min(0.5, AVERAGE_DEGREE / (num_nodes - 1))
+    timings = {}
+
+    def create():
+        random.seed(seed)
+        simulator = TrafficSimulator(num_nodes)
+        return timed(simulator.create_network, None, edge_probability)
+    timings['create_network'] = best_time(create, repeats)
+
+    random.seed(seed)
+    simulator = TrafficSimulator(num_nodes)
+    simulator.create_network(edge_probability=edge_probability)
+    pairs = [tuple(random.sample(simulator.nodes, 2)) for _ in range(PATH_SAMPLES)]
+
+    def find_paths():
+        simulator.path_cache.clear()
+        start = time.perf_counter()
+        for source, destination in pairs:
+            simulator.find_k_paths(source, destination, R_en.max_path)
+        return (time.perf_counter() - start) / len(pairs)
+    timings['find_k_paths'] = best_time(find_paths, repeats)
+
+    services = simulator.generate_services(num_services)
+    grooming_services = [{'odu_size': service['rate'], 'path': service['possible_paths'][0]}
+                         for service in services if service['possible_paths']]
+
+    def process():
+        return timed(build_network(simulator).process_services, grooming_services)
+    timings['process_services'] = best_time(process, repeats)
+
+    def propagate():
+        network = build_network(simulator)
+        network.process_services(grooming_services)
+        return timed(network.propagate_odu_exchanges)
+    timings['propagate_odu_exchanges'] = best_time(propagate, repeats)
+
+    def run():
+        return timed(build_network(simulator).run_network, grooming_services)
+    timings['run_network'] = best_time(run, repeats)
+
+    loaded_network = build_network(simulator)
+    loaded_network.run_network(grooming_services)
+    timings['calculate_wdm_count'] = best_time(lambda: timed(loaded_network.calculate_wdm_count), repeats)
+
+    def admit():
+        network = build_network(simulator)
+        start = time.perf_counter()
+        for grooming_service in grooming_services:
+            network.admit(grooming_service)
+        return (time.perf_counter() - start) / len(grooming_services)
+    timings['admit'] = best_time(admit, repeats)
+
+    def load_level():
+        random.seed(seed)
+        simulator.path_cache.clear()
+        return timed(run_load_level, simulator, num_services, False)
+    timings['load_level'] = best_time(load_level, repeats)
+    return timings
+
+
+def run_benchmarks(scales, repeats=3, seed=0, verbose=True):
+    """
+    Run all benchmarks at the given scales.
+
+    :return: {'meta': {...}, 'results': {'<benchmark>@<nodes>x<services>': seconds}}
+    """
+    results = {}
+    for num_nodes, num_services in scales:
+        for name, seconds in bench_scale(num_nodes, num_services, repeats, seed).items():
+            key = f"{name}@{num_nodes}x{num_services}"
+            results[key] = seconds
+            if verbose:
+                print(f"{key:<40} {seconds * 1000:>12.3f} ms")
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'repeats': repeats,
+            'seed': seed
+        },
+        'results': results
+    }
+
+
+def compare(current, baseline, tolerance=0.25):
+    """
+    Compare two benchmark reports.
+
+    :param tolerance: allowed relative slowdown before a benchmark counts as a regression
+    :return: list of (key, baseline seconds, current seconds, ratio, regressed)
+    """
+    rows = []
+    for key, seconds in current['results'].items():
+        if key not in baseline['results']:
+            continue
+        baseline_seconds = baseline['results'][key]
+        ratio = seconds / baseline_seconds if baseline_seconds else float('inf')
+        rows.append((key, baseline_seconds, seconds, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks of the simulator hot paths')
+    parser.add_argument('--output', default='bench_results.json', help='file the results are written to')
+    parser.add_argument('--compare', default=None, help='baseline results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown in --compare')
+    parser.add_argument('--scales', default=None,
+                        help='comma separated NODESxSERVICES list, default ' + ','.join(f"{n}x{s}" for n, s in SCALES))
+    parser.add_argument('--repeats', type=int, default=3, help='runs per benchmark, the fastest is kept')
+    parser.add_argument('--seed', type=int, default=0, help='random seed of topologies and traffic')
+    args = parser.parse_args()
+
+    scales = SCALES
+    if args.scales:
+        scales = [tuple(int(value) for value in scale.split('x')) for scale in args.scales.split(',')]
+    report = run_benchmarks(scales, args.repeats, args.seed)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+        regressions = 0
+        print(f"\n{'Benchmark':<40} {'Baseline ms':>12} {'Current ms':>12} {'Ratio':>7}")
+        for key, baseline_seconds, seconds, ratio, regressed in compare(report, baseline, args.tolerance):
+            print(f"{key:<40} {baseline_seconds * 1000:>12.3f} {seconds * 1000:>12.3f} {ratio:>7.2f}"
+                  f"{'  REGRESSION' if regressed else ''}")
+            regressions += regressed
+        if regressions:
+            print(f"\n{regressions} benchmark(s) slower than the baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
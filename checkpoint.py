@@ -0,0 +1,33 @@
+import os
+import pickle
+import zlib
+
+CHECKPOINT_VERSION = 1  # Bumped when the layout of the saved state changes
+
+
+def save_checkpoint(filename, state):
+    """
+    Write a compressed binary snapshot of the simulator state. The file is replaced atomically, so a crash while
+    writing leaves the previous checkpoint intact.
+
+    :param filename: checkpoint file
+    :param state: picklable dict (simulator, network, results, random state, sweep position, ...)
+    """
+    data = zlib.compress(pickle.dumps({'version': CHECKPOINT_VERSION, 'state': state},
+                                      protocol=pickle.HIGHEST_PROTOCOL), 6)
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_filename, filename)
+
+
+def load_checkpoint(filename):
+    """Read a snapshot written by save_checkpoint and return its state dict"""
+    with open(filename, 'rb') as file:
+        snapshot = pickle.loads(zlib.decompress(file.read()))
+    if snapshot.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Checkpoint {filename!r} has version {snapshot.get('version')}, "
+                         f"expected {CHECKPOINT_VERSION}")
+    return snapshot['state']
@@ -0,0 +1,181 @@
+import argparse
+import heapq
+import os
+import random
+
+import R_en
+from R_en import TrafficSimulator, build_network, groom_service
+from checkpoint import load_checkpoint, save_checkpoint
+from experiments import confidence_interval
+
+ARRIVAL = 0
+DEPARTURE = 1
+
+
+def run_dynamic(simulator, arrival_rate, mean_holding_time, num_arrivals, warmup_arrivals=0, batches=10,
+                holding_time=None, verbose=False, checkpoint_file=None, checkpoint_every=None, resume_state=None):
+    """
+    Discrete-event simulation of dynamic traffic: Poisson arrivals are admitted through Network.admit and release
+    their capacity through Network.release when they depart. The event heap only holds the next arrival and the
+    departures of the services in the network, and each event only touches the nodes and links of one path.
+
+    :param simulator: TrafficSimulator with its network topology created
+    :param arrival_rate: mean number of arrivals per time unit
+    :param mean_holding_time: mean holding time of a service
+    :param num_arrivals: number of arrivals measured after the warm-up
+    :param warmup_arrivals: number of first arrivals discarded from the statistics
+    :param batches: number of batches used for the batch-means confidence interval
+    :param holding_time: function returning a holding time sample, default exponential with mean_holding_time
+    :param verbose: print progress after each batch
+    :param checkpoint_file: snapshot the simulation here every checkpoint_every arrivals
+    :param checkpoint_every: arrivals between snapshots, default one batch
+    :param resume_state: state loaded from such a snapshot, the simulation continues from its event time
+                         (a custom holding_time function must be passed again)
+    :return: {'blocking_probability', 'blocking_ci', 'arrivals', 'blocked', 'events', 'time',
+              'mean_active_services', 'mean_wdm_count', 'batch_blocking'}
+    """
+    total_arrivals = warmup_arrivals + num_arrivals
+    batch_size = max(num_arrivals // batches, 1)
+    arrivals = 0
+    blocked = 0
+    batch_blocked = 0
+    batch_blocking = []
+    processed_events = 0
+    active_services = 0
+    start_time = None
+    last_time = 0.0
+    active_area = 0.0  # Time integral of the number of services in the network after the warm-up
+    wdm_area = 0.0  # Time integral of the WDM count after the warm-up
+    if resume_state is not None:
+        # Restore the seeded streams before binding them, the simulator passed in may not carry them
+        for name, state in resume_state.get('stream_states', {}).items():
+            simulator.streams.setdefault(name, random.Random()).setstate(state)
+    rng = simulator.streams.get('traffic', random)
+    tie_rng = simulator.streams.get('tie_breaking')
+    if holding_time is None:
+        holding_time = lambda: rng.expovariate(1 / mean_holding_time)
+    if resume_state is None:
+        network = build_network(simulator)
+        events = [(rng.expovariate(arrival_rate), 0, ARRIVAL, None)]  # (time, sequence, kind, admitted service)
+        sequence = 1  # Tie-breaker so simultaneous events are handled in creation order
+    else:
+        network = resume_state['network']
+        events = resume_state['events']
+        sequence = resume_state['sequence']
+        arrivals = resume_state['arrivals']
+        blocked = resume_state['blocked']
+        batch_blocked = resume_state['batch_blocked']
+        batch_blocking = resume_state['batch_blocking']
+        processed_events = resume_state['processed_events']
+        active_services = resume_state['active_services']
+        start_time = resume_state['start_time']
+        last_time = resume_state['last_time']
+        active_area = resume_state['active_area']
+        wdm_area = resume_state['wdm_area']
+        random.setstate(resume_state['random_state'])
+    checkpoint_every = checkpoint_every or batch_size
+    last_checkpoint = arrivals
+
+    while events and arrivals < total_arrivals:
+        if checkpoint_file and arrivals - last_checkpoint >= checkpoint_every:
+            # Between two events the state is consistent, so the snapshot resumes at this event time
+            save_checkpoint(checkpoint_file, {
+                'parameters': {'arrival_rate': arrival_rate, 'mean_holding_time': mean_holding_time,
+                               'num_arrivals': num_arrivals, 'warmup_arrivals': warmup_arrivals,
+                               'batches': batches},
+                'simulator': simulator, 'network': network, 'events': events, 'sequence': sequence,
+                'arrivals': arrivals, 'blocked': blocked, 'batch_blocked': batch_blocked,
+                'batch_blocking': batch_blocking, 'processed_events': processed_events,
+                'active_services': active_services, 'start_time': start_time, 'last_time': last_time,
+                'active_area': active_area, 'wdm_area': wdm_area, 'random_state': random.getstate(),
+                'stream_states': {name: stream.getstate() for name, stream in simulator.streams.items()}
+            })
+            last_checkpoint = arrivals
+        now, _, kind, grooming_service = heapq.heappop(events)
+        processed_events += 1
+        if start_time is not None:
+            active_area += active_services * (now - last_time)
+            wdm_area += network.wdm_count * (now - last_time)
+        last_time = now
+
+        if kind == DEPARTURE:
+            network.release(grooming_service)
+            active_services -= 1
+            continue
+
+        # Arrival: schedule the next one, then try to admit this service
+        heapq.heappush(events, (now + rng.expovariate(arrival_rate), sequence, ARRIVAL, None))
+        sequence += 1
+        arrivals += 1
+        if arrivals == warmup_arrivals + 1:
+            start_time = now
+        grooming_service = groom_service(network, simulator.generate_service(), tie_rng)
+        if grooming_service is not None:
+            heapq.heappush(events, (now + holding_time(), sequence, DEPARTURE, grooming_service))
+            sequence += 1
+            active_services += 1
+        if arrivals <= warmup_arrivals:
+            continue
+        if grooming_service is None:
+            blocked += 1
+            batch_blocked += 1
+        measured = arrivals - warmup_arrivals
+        if measured % batch_size == 0 and len(batch_blocking) < batches:
+            batch_blocking.append(batch_blocked / batch_size)
+            batch_blocked = 0
+            if verbose:
+                print(f"Arrivals: {measured}  Batch blocking: {batch_blocking[-1]:.2%}  Active: {active_services}")
+
+    measured = arrivals - warmup_arrivals
+    duration = last_time - start_time if start_time is not None else 0.0
+    _, blocking_ci = confidence_interval(batch_blocking) if batch_blocking else (0.0, float('nan'))
+    return {
+        'blocking_probability': blocked / measured if measured else 0.0,
+        'blocking_ci': blocking_ci,
+        'arrivals': measured,
+        'blocked': blocked,
+        'events': processed_events,
+        'time': duration,
+        'mean_active_services': active_area / duration if duration else 0.0,
+        'mean_wdm_count': wdm_area / duration if duration else 0.0,
+        'batch_blocking': batch_blocking
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dynamic traffic simulation with arrivals and departures')
+    parser.add_argument('--nodes', type=int, default=R_en.nbOfNode, help='number of nodes')
+    parser.add_argument('--edge-probability', type=float, default=0.5, help='edge probability of the topology')
+    parser.add_argument('--load', type=float, default=200, help='offered load in Erlangs (arrival rate x holding time)')
+    parser.add_argument('--holding-time', type=float, default=1.0, help='mean holding time')
+    parser.add_argument('--arrivals', type=int, default=100000, help='measured arrivals')
+    parser.add_argument('--warmup', type=int, default=10000, help='arrivals discarded before measuring')
+    parser.add_argument('--batches', type=int, default=10, help='batches for the confidence interval')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--checkpoint', default=None, help='snapshot the simulation to this file every batch')
+    parser.add_argument('--resume', action='store_true', help='continue from the --checkpoint file if it exists')
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error('--resume needs --checkpoint')
+
+    if args.resume and os.path.exists(args.checkpoint):
+        resume_state = load_checkpoint(args.checkpoint)
+        parameters = resume_state['parameters']
+        print(f"Resuming at arrival {resume_state['arrivals']}, time {resume_state['last_time']:.3f}")
+        result = run_dynamic(resume_state['simulator'], parameters['arrival_rate'], parameters['mean_holding_time'],
+                             parameters['num_arrivals'], parameters['warmup_arrivals'], parameters['batches'],
+                             verbose=True, checkpoint_file=args.checkpoint, resume_state=resume_state)
+    else:
+        random.seed(args.seed)
+        simulator = TrafficSimulator(args.nodes)
+        simulator.create_network(edge_probability=args.edge_probability)
+        result = run_dynamic(simulator, args.load / args.holding_time, args.holding_time, args.arrivals, args.warmup,
+                             args.batches, verbose=True, checkpoint_file=args.checkpoint)
+    print(f"\nBlocking probability: {result['blocking_probability']:.3%} ± {result['blocking_ci']:.3%} (95% CI)")
+    print(f"Mean services in the network: {result['mean_active_services']:.1f}")
+    print(f"Mean number of WDMs: {result['mean_wdm_count']:.1f}")
+    print(f"Events processed: {result['events']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import argparse
+import math
+import os
+import random
+import statistics
+from multiprocessing import Pool
+
+import R_en
+from R_en import TrafficSimulator, run_incremental_sweep, run_load_level, run_sweep
+
+# Two-sided 95% Student t quantiles by degrees of freedom, the normal value is used beyond the table
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+        12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980}
+
+METRICS = ['grooming_lightpaths', 'no_grooming_lightpaths', 'blocked_percentage']
+
+
+def confidence_interval(values):
+    """Return (mean, half width of the 95% confidence interval) of a list of samples"""
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, float('nan')
+    degrees = len(values) - 1
+    if degrees > 120:
+        t_value = 1.960
+    else:
+        # Closest tabulated degrees of freedom at or below, which slightly widens the interval
+        t_value = T_95[max(table_degrees for table_degrees in T_95 if table_degrees <= degrees)]
+    return mean, t_value * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def run_replication(seed, num_nodes=None, edge_probability=0.5, incremental=False):
+    """
+    Run one full load sweep on its own random topology and traffic.
+
+    :param seed: seed of the random module for this replication
+    :param num_nodes: number of nodes, default R_en.nbOfNode
+    :param edge_probability: edge probability of the random topology
+    :param incremental: use run_incremental_sweep (nested traffic) instead of run_sweep
+    :return: (seed, list of result records)
+    """
+    random.seed(seed)
+    simulator = TrafficSimulator(num_nodes or R_en.nbOfNode)
+    simulator.create_network(edge_probability=edge_probability)
+    sweep = run_incremental_sweep if incremental else run_sweep
+    return seed, sweep(simulator, verbose=False)
+
+
+def _run_replication(args):
+    return run_replication(*args)
+
+
+def aggregate_results(replications):
+    """
+    Combine the sweeps of several replications per load level.
+    Sweeps stop at different levels, so each level only counts the replications that reached it.
+
+    :param replications: list of result lists, as returned by run_sweep
+    :return: list of {'num_services', 'replications', '<metric>_mean', '<metric>_ci'} records
+    """
+    levels = {}
+    for results in replications:
+        for result in results:
+            levels.setdefault(result['num_services'], []).append(result)
+    aggregated = []
+    for num_services in sorted(levels):
+        records = levels[num_services]
+        entry = {'num_services': num_services, 'replications': len(records)}
+        for metric in METRICS:
+            entry[metric + '_mean'], entry[metric + '_ci'] = confidence_interval([record[metric] for record in records])
+        aggregated.append(entry)
+    return aggregated
+
+
+def run_replications(seeds, num_nodes=None, edge_probability=0.5, incremental=False, processes=None):
+    """
+    Fan independent replications (topology + traffic) across a process pool and aggregate them.
+
+    :param seeds: one seed per replication
+    :param processes: number of worker processes, None for one per CPU
+    :return: (aggregated records, {seed: result list})
+    """
+    tasks = [(seed, num_nodes, edge_probability, incremental) for seed in seeds]
+    by_seed = {}
+    with Pool(processes) as pool:
+        for seed, results in pool.imap_unordered(_run_replication, tasks):
+            by_seed[seed] = results
+    return aggregate_results([by_seed[seed] for seed in seeds]), by_seed
+
+
+def find_blocking_threshold(simulator, target_blocking=0.01, tolerance=5, num_services=30, repeats=1,
+                            max_services=1000000):
+    """
+    Find the load where the blocking rate reaches target_blocking by doubling the load until it is bracketed,
+    then bisecting. Assumes blocking grows with the load; repeats averages several traffic draws per load
+    to smooth out the noise of single draws.
+
+    :param simulator: TrafficSimulator with its network topology created
+    :param target_blocking: blocking rate to reach
+    :param tolerance: stop when the bracket is at most this many services wide, at least 1
+    :param num_services: first load tried, positive
+    :param repeats: traffic draws averaged per evaluated load
+    :param max_services: give up when the target is not reached at this load
+    :return: {'num_services': smallest load found at or above the target, 'low', 'high',
+              'evaluations': number of simulated load levels, 'history': [(num_services, blocking rate)]}
+    :raises ValueError: on invalid arguments, or if blocking stays below the target up to max_services
+    """
+    if tolerance < 1:
+        raise ValueError(f"tolerance must be at least 1, got {tolerance}")
+    if num_services < 1:
+        raise ValueError(f"num_services must be positive, got {num_services}")
+    history = []
+
+    def blocking_rate(load):
+        rates = [run_load_level(simulator, load, verbose=False)['blocked_percentage'] for _ in range(repeats)]
+        history.append((load, statistics.fmean(rates)))
+        return history[-1][1]
+
+    # Bracket: blocking at low is below the target (or low is the smallest load), blocking at high reaches it
+    low = 1
+    high = num_services
+    while blocking_rate(high) < target_blocking:
+        if high >= max_services:
+            raise ValueError(f"Blocking stays below {target_blocking:.2%} up to {high} services "
+                             f"({len(history) * repeats} simulations)")
+        low = high
+        high = min(high * 2, max_services)
+
+    # Bisect
+    while high - low > tolerance:
+        middle = (low + high) // 2
+        if blocking_rate(middle) >= target_blocking:
+            high = middle
+        else:
+            low = middle
+    return {'num_services': high, 'low': low, 'high': high,
+            'evaluations': len(history) * repeats, 'history': history}
+
+
+def savings_ratio(result):
+    """Lightpaths saved by grooming as a fraction of the no-grooming lightpaths of a result record"""
+    no_grooming_lightpaths = result['no_grooming_lightpaths']
+    if not no_grooming_lightpaths:
+        return 0.0
+    return (no_grooming_lightpaths - result['grooming_lightpaths']) / no_grooming_lightpaths
+
+
+def run_policy_replication(seed, configs, load_levels, num_nodes=None, edge_probability=0.5,
+                           common_random_numbers=True, antithetic=False):
+    """
+    Run the same load levels under each configuration on one seeded topology.
+
+    :param seed: seed of the replication, the topology, traffic and tie-breaking streams derive from it
+    :param configs: list of {'routing': R_en.ROUTING_POLICIES entry, 'baseline': R_en.NO_GROOMING_POLICIES entry}
+    :param load_levels: numbers of services, each level offers fresh traffic
+    :param common_random_numbers: replay the same traffic and tie-breaking streams for every configuration,
+                                  otherwise each configuration draws its own
+    :param antithetic: also run every configuration on the antithetic traffic stream and average the pair
+    :return: (seed, mean savings ratio over the load levels per configuration)
+    """
+    simulator = TrafficSimulator(num_nodes or R_en.nbOfNode)
+    simulator.seed_streams(seed, ('topology',))
+    simulator.create_network(edge_probability=edge_probability)
+    saved_policies = R_en.routing_policy, R_en.no_grooming_policy
+    values = []
+    try:
+        for index, config in enumerate(configs):
+            R_en.routing_policy = config.get('routing', saved_policies[0])
+            R_en.no_grooming_policy = config.get('baseline', saved_policies[1])
+            stream_seed = seed if common_random_numbers else f"{seed}:{index}"
+            draws = []
+            for antithetic_draw in ((False, True) if antithetic else (False,)):
+                simulator.seed_streams(stream_seed, ('traffic', 'tie_breaking'), antithetic_draw)
+                draws.append(statistics.fmean(savings_ratio(run_load_level(simulator, load, verbose=False))
+                                              for load in load_levels))
+            values.append(statistics.fmean(draws))
+    finally:
+        R_en.routing_policy, R_en.no_grooming_policy = saved_policies
+    return seed, values
+
+
+def _run_policy_replication(args):
+    return run_policy_replication(*args)
+
+
+def compare_policies(configs, load_levels, target_width=None, seed=0, min_replications=5, max_replications=200,
+                     num_nodes=None, edge_probability=0.5, common_random_numbers=True, antithetic=False,
+                     processes=None):
+    """
+    Compare configurations on the mean savings ratio over load levels. The compared quantities are the savings
+    ratio of the first configuration and the difference of every other configuration to it, paired per
+    replication. Replications are added one pool batch at a time until the 95% confidence half width of every
+    quantity is at most target_width (or max_replications is reached); without target_width exactly
+    min_replications are run.
+
+    :param configs: see run_policy_replication
+    :param seed: seed of the first replication, the next ones use seed + 1, seed + 2, ...
+    :param processes: number of worker processes, None for one per CPU
+    :return: {'replications', 'simulations' (load levels simulated), 'quantities': [{'name', 'mean', 'ci'}]}
+    """
+    batch = processes or os.cpu_count() or 1
+    values = []  # One list of per-configuration savings ratios per replication
+    with Pool(processes) as pool:
+        while True:
+            count = min_replications - len(values) if len(values) < min_replications else batch
+            count = min(count, max_replications - len(values))
+            tasks = [(seed + len(values) + offset, configs, load_levels, num_nodes, edge_probability,
+                      common_random_numbers, antithetic) for offset in range(count)]
+            values.extend(replication_values for _, replication_values in pool.map(_run_policy_replication, tasks))
+
+            quantities = [('savings_ratio ' + _config_name(configs[0]), [value[0] for value in values])]
+            for index in range(1, len(configs)):
+                quantities.append((f"{_config_name(configs[index])} - {_config_name(configs[0])}",
+                                   [value[index] - value[0] for value in values]))
+            intervals = [(name, *confidence_interval(samples)) for name, samples in quantities]
+            if (target_width is None or len(values) >= max_replications
+                    or all(ci <= target_width for _, _, ci in intervals)):
+                break
+    return {
+        'replications': len(values),
+        'simulations': len(values) * len(configs) * len(load_levels) * (2 if antithetic else 1),
+        'quantities': [{'name': name, 'mean': mean, 'ci': ci} for name, mean, ci in intervals]
+    }
+
+
+def _config_name(config):
+    return '/'.join(config[key] for key in ('routing', 'baseline') if key in config) or 'default'
+
+
+def parse_config(text):
+    """'ROUTING[/BASELINE]' -> {'routing', 'baseline'}, e.g. 'capacity_aware/least_loaded'"""
+    routing, _, baseline = text.partition('/')
+    if routing not in R_en.ROUTING_POLICIES or (baseline and baseline not in R_en.NO_GROOMING_POLICIES):
+        raise argparse.ArgumentTypeError(f"invalid configuration {text!r}, expected ROUTING[/BASELINE] with routing "
+                                         f"in {R_en.ROUTING_POLICIES} and baseline in {R_en.NO_GROOMING_POLICIES}")
+    return {'routing': routing, 'baseline': baseline} if baseline else {'routing': routing}
+
+
+def print_aggregated(aggregated):
+    """Print mean and 95% confidence interval per load level"""
+    print(f"{'Services':>8} {'Runs':>5} {'Grooming':>16} {'No grooming':>16} {'Blocking':>18}")
+    for entry in aggregated:
+        print(f"{entry['num_services']:>8} {entry['replications']:>5} "
+              f"{entry['grooming_lightpaths_mean']:>8.1f} ±{entry['grooming_lightpaths_ci']:>6.1f} "
+              f"{entry['no_grooming_lightpaths_mean']:>8.1f} ±{entry['no_grooming_lightpaths_ci']:>6.1f} "
+              f"{entry['blocked_percentage_mean']:>9.2%} ±{entry['blocked_percentage_ci']:>7.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte-Carlo replications of the grooming simulation')
+    parser.add_argument('--replications', type=int, default=10, help='number of independent replications')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first replication')
+    parser.add_argument('--nodes', type=int, default=R_en.nbOfNode, help='number of nodes')
+    parser.add_argument('--edge-probability', type=float, default=0.5, help='edge probability of the topology')
+    parser.add_argument('--incremental', action='store_true', help='nested traffic: each level extends the previous one')
+    parser.add_argument('--threshold', action='store_true', help='search the load where blocking reaches the target')
+    parser.add_argument('--target-blocking', type=float, default=0.01, help='blocking rate searched by --threshold')
+    parser.add_argument('--tolerance', type=int, default=5, help='width in services at which --threshold stops')
+    parser.add_argument('--repeats', type=int, default=1, help='traffic draws averaged per load in --threshold')
+    parser.add_argument('--compare', type=parse_config, nargs='+', default=None, metavar='ROUTING[/BASELINE]',
+                        help='compare the savings ratio of these configurations on common random numbers')
+    parser.add_argument('--levels', type=int, nargs='+', default=[50, 100, 150], help='load levels of --compare')
+    parser.add_argument('--target-width', type=float, default=None,
+                        help='with --compare, replicate until every 95%% CI half width is at most this')
+    parser.add_argument('--max-replications', type=int, default=200, help='replication limit of --target-width')
+    parser.add_argument('--independent', action='store_true',
+                        help='with --compare, draw independent traffic per configuration instead of common numbers')
+    parser.add_argument('--antithetic', action='store_true', help='with --compare, pair each run with antithetic traffic')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    if args.compare:
+        comparison = compare_policies(args.compare, args.levels, args.target_width, args.seed, args.replications,
+                                      args.max_replications, args.nodes, args.edge_probability,
+                                      not args.independent, args.antithetic, args.processes)
+        print(f"{comparison['replications']} replications, {comparison['simulations']} simulated load levels")
+        for quantity in comparison['quantities']:
+            print(f"{quantity['name']:>40}: {quantity['mean']:>8.2%} ±{quantity['ci']:>7.2%}")
+        return
+
+    if args.threshold:
+        random.seed(args.seed)
+        simulator = TrafficSimulator(args.nodes)
+        simulator.create_network(edge_probability=args.edge_probability)
+        try:
+            search = find_blocking_threshold(simulator, args.target_blocking, args.tolerance, repeats=args.repeats)
+        except ValueError as error:
+            print(error)
+            return
+        for load, rate in search['history']:
+            print(f"Services: {load:>7}  Blocking rate: {rate:.2%}")
+        print(f"Blocking reaches {args.target_blocking:.2%} between {search['low']} and {search['high']} services "
+              f"({search['evaluations']} simulations)")
+        return
+
+    seeds = list(range(args.seed, args.seed + args.replications))
+    aggregated, _ = run_replications(seeds, args.nodes, args.edge_probability, args.incremental,
+                                     args.processes)
+    print_aggregated(aggregated)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import os
+import random
+from itertools import islice
+from multiprocessing import Pool
+
+import networkx as nx
+
+import R_en
+from R_en import TrafficSimulator, build_network, groom_service, select_candidate
+from results import ResultSink
+
+_worker_network = None  # Loaded network shared with the failure scenario worker processes
+_worker_graph = None
+_worker_options = None
+
+
+def affected_services(network, element):
+    """Admitted services carried by a link (node1, node2) or passing through a node, from the reverse indexes"""
+    if isinstance(element, tuple):
+        node1, node2 = element
+        services = network.link_services.get((node1, node2) if node1 < node2 else (node2, node1))
+    else:
+        services = network.node_services.get(element)
+    return list(services.values()) if services else []
+
+
+def run_failure_scenario(network, graph, element, max_path=3, weight=None, policy=None):
+    """
+    Fail one link or node of a loaded network: release the services it carries and re-route them on the residual
+    state, trying up to max_path shortest paths around the failure. Only the affected services are touched, and the
+    network is back in its state before the failure on return, so scenarios can run one after the other.
+
+    :param network: Network loaded through admit
+    :param graph: networkx topology of the network
+    :param element: failed link as (node1, node2) or failed node
+    :param max_path: candidate paths per re-routed service
+    :param weight: edge attribute used as link weight (None = hop count)
+    :param policy: routing policy used to choose among the feasible paths, see R_en.select_candidate
+    :return: {'failure', 'element', 'disrupted', 'restored', 'lost', 'wdm_before', 'wdm_after'}, lost counting the
+             services that end at a failed node, found no feasible path or did not fit on admit
+    """
+    is_link = isinstance(element, tuple)
+    # Index order changes as scenarios release and re-admit services, so re-route in a fixed order
+    disrupted = sorted(affected_services(network, element), key=lambda service: (service['path'], service['odu_size']))
+    wdm_before = network.wdm_count
+    for service in disrupted:
+        network.release(service)
+
+    residual_graph = nx.restricted_view(graph, [] if is_link else [element], [element] if is_link else [])
+    restored = []
+    for service in disrupted:
+        source, destination = service['path'][0], service['path'][-1]
+        if not is_link and element in (source, destination):
+            continue  # Traffic added or dropped at the failed node cannot be restored
+        try:
+            candidates = list(islice(nx.shortest_simple_paths(residual_graph, source, destination, weight=weight),
+                                     max_path))
+        except nx.NetworkXNoPath:
+            candidates = []
+        chosen = select_candidate(network.evaluate_candidates(service, candidates), policy)
+        if chosen is not None:
+            restored_service = {
+                'odu_size': service['odu_size'],
+                'path': chosen['path']
+            }
+            can_use, _ = network.admit(restored_service)
+            if can_use:
+                restored.append(restored_service)
+    wdm_after = network.wdm_count
+
+    # Undo the scenario: the original services fit before the failure, so they fit again
+    for service in restored:
+        network.release(service)
+    for service in disrupted:
+        network.admit(service)
+
+    return {
+        'failure': 'link' if is_link else 'node',
+        'element': f"{element[0]}-{element[1]}" if is_link else str(element),
+        'disrupted': len(disrupted),
+        'restored': len(restored),
+        'lost': len(disrupted) - len(restored),
+        'wdm_before': wdm_before,
+        'wdm_after': wdm_after
+    }
+
+
+def _init_failure_worker(network, graph, options):
+    global _worker_network, _worker_graph, _worker_options
+    _worker_network = network
+    _worker_graph = graph
+    _worker_options = options
+
+
+def _run_failure_scenario(element):
+    """Worker side of run_failure_sweep, each process keeps its own copy of the loaded network"""
+    return run_failure_scenario(_worker_network, _worker_graph, element, **_worker_options)
+
+
+def run_failure_sweep(network, graph, failures='links', max_path=3, weight=None, policy=None, processes=None):
+    """
+    Run every single link and/or node failure scenario of a loaded network across a process pool.
+
+    :param network: Network loaded through admit, sent once to each worker process
+    :param graph: networkx topology of the network
+    :param failures: 'links', 'nodes' or 'all'
+    :param processes: number of worker processes, None for one per CPU, 1 to run in this process
+    :return: list of run_failure_scenario records, links first, in graph order
+    """
+    elements = []
+    if failures in ('links', 'all'):
+        elements.extend(tuple(edge) for edge in graph.edges())
+    if failures in ('nodes', 'all'):
+        elements.extend(graph.nodes())
+    options = {'max_path': max_path, 'weight': weight, 'policy': policy or R_en.routing_policy}
+    if processes == 1:
+        return [run_failure_scenario(network, graph, element, **options) for element in elements]
+    with Pool(processes, initializer=_init_failure_worker, initargs=(network, graph, options)) as pool:
+        return pool.map(_run_failure_scenario, elements,
+                        chunksize=max(len(elements) // (4 * (processes or os.cpu_count() or 1)), 1))
+
+
+def summarize_failures(records):
+    """Per failure type: scenarios, services disrupted (mean and worst), restorability and extra WDMs"""
+    summary = {}
+    for failure in ('link', 'node'):
+        scenarios = [record for record in records if record['failure'] == failure]
+        if not scenarios:
+            continue
+        disrupted = sum(record['disrupted'] for record in scenarios)
+        restored = sum(record['restored'] for record in scenarios)
+        summary[failure] = {
+            'scenarios': len(scenarios),
+            'mean_disrupted': disrupted / len(scenarios),
+            'max_disrupted': max(record['disrupted'] for record in scenarios),
+            'restorability': restored / disrupted if disrupted else 1.0,
+            'mean_extra_wdm': sum(record['wdm_after'] - record['wdm_before'] for record in scenarios) / len(scenarios)
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Single link/node failure analysis of a groomed network')
+    parser.add_argument('--nodes', type=int, default=R_en.nbOfNode, help='number of nodes')
+    parser.add_argument('--edge-probability', type=float, default=0.5, help='edge probability of the topology')
+    parser.add_argument('--services', type=int, default=100, help='services groomed before the failures')
+    parser.add_argument('--failures', choices=['links', 'nodes', 'all'], default='all', help='elements to fail')
+    parser.add_argument('--routing', choices=R_en.ROUTING_POLICIES, default=R_en.routing_policy,
+                        help='path choice when grooming and re-routing')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--results', default=None, help='write one record per scenario (.csv, .jsonl, .parquet)')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    R_en.routing_policy = args.routing
+    simulator = TrafficSimulator(args.nodes)
+    simulator.create_network(edge_probability=args.edge_probability)
+    network = build_network(simulator)
+    blocked = sum(1 for service in simulator.generate_services(args.services) if groom_service(network, service) is None)
+    print(f"Groomed {args.services - blocked} of {args.services} services on {network.wdm_count} WDMs")
+
+    records = run_failure_sweep(network, simulator.graph, args.failures, R_en.max_path, simulator.weight,
+                                args.routing, args.processes)
+    if args.results:
+        with ResultSink(args.results) as sink:
+            for record in records:
+                sink.write(record)
+    for failure, entry in summarize_failures(records).items():
+        print(f"{failure.capitalize()} failures: {entry['scenarios']} scenarios, "
+              f"{entry['mean_disrupted']:.1f} services disrupted on average (worst {entry['max_disrupted']}), "
+              f"{entry['restorability']:.2%} restored, {entry['mean_extra_wdm']:+.1f} WDMs after restoration")
+
+
+if __name__ == "__main__":
+    main()
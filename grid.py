@@ -0,0 +1,189 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+from multiprocessing import Pool
+
+import OTH_en
+import R_en
+from experiments import confidence_interval, run_replication, savings_ratio
+from results import ResultSink
+
+GRID_VERSION = 1  # Part of every result key, bumped when the model changes so memoized results are recomputed
+
+# Grid parameter -> (module, global) set in the worker process before a point runs
+MODULE_PARAMETERS = {
+    'max_path': (R_en, 'max_path'),
+    'rate_weights': (R_en, 'rate_weights'),
+    'routing': (R_en, 'routing_policy'),
+    'baseline': (R_en, 'no_grooming_policy'),
+    'max_io_cards': (OTH_en, 'MAX_IO_CARDS'),
+    'max_capacity': (OTH_en, 'MAX_CAPACITY'),
+    'max_odus': (OTH_en, 'MAX_ODUS'),
+    'lightpath_capacity': (OTH_en, 'LIGHTPATH_CAPACITY')
+}
+# Grid parameters passed to run_replication, with their defaults
+RUN_PARAMETERS = {'nodes': R_en.nbOfNode, 'edge_probability': 0.5, 'incremental': False}
+
+
+def default_config():
+    """The value of every grid parameter in the current process"""
+    config = dict(RUN_PARAMETERS)
+    for name, (module, attribute) in MODULE_PARAMETERS.items():
+        config[name] = getattr(module, attribute)
+    return config
+
+
+def expand_grid(spec):
+    """
+    Expand a grid specification into its points.
+
+    :param spec: {'grid': {parameter: list of values}, 'fixed': {parameter: value}, 'seeds': count or list},
+                 parameters from MODULE_PARAMETERS or RUN_PARAMETERS, the ones left out keep their defaults
+    :return: list of (config, seed), every combination of the grid values for every seed
+    """
+    grid = spec.get('grid', {})
+    fixed = spec.get('fixed', {})
+    unknown = (set(grid) | set(fixed)) - set(MODULE_PARAMETERS) - set(RUN_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown grid parameters {sorted(unknown)}, "
+                         f"expected some of {sorted(MODULE_PARAMETERS) + sorted(RUN_PARAMETERS)}")
+    seeds = spec.get('seeds', 1)
+    seeds = list(range(seeds)) if isinstance(seeds, int) else list(seeds)
+    names = sorted(grid)
+    points = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        config = default_config()
+        config.update(fixed)
+        config.update(zip(names, values))
+        points.extend((config, seed) for seed in seeds)
+    return points
+
+
+def point_key(config, seed):
+    """Hash of a configuration and seed, the name of its memoized result"""
+    text = json.dumps({'version': GRID_VERSION, 'config': config, 'seed': seed}, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+def run_point(config, seed):
+    """
+    Run the load sweep of one grid point: set the module parameters of config, then one seeded replication.
+    Each worker process runs one point at a time, so the module globals can be set without restoring them.
+
+    :return: list of result records, as returned by run_sweep
+    """
+    for name, (module, attribute) in MODULE_PARAMETERS.items():
+        setattr(module, attribute, config[name])
+    _, results = run_replication(seed, config['nodes'], config['edge_probability'], config['incremental'])
+    return results
+
+
+def _run_point(args):
+    key, config, seed = args
+    return key, run_point(config, seed)
+
+
+def load_memoized(cache_dir, key):
+    """Memoized results of a point, None if it has not run yet"""
+    filename = os.path.join(cache_dir, key + '.json')
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as file:
+        return json.load(file)['results']
+
+
+def save_memoized(cache_dir, key, config, seed, results):
+    """Store the results of a point with its configuration, replacing the file atomically"""
+    filename = os.path.join(cache_dir, key + '.json')
+    with open(filename + '.tmp', 'w') as file:
+        json.dump({'config': config, 'seed': seed, 'results': results}, file)
+    os.replace(filename + '.tmp', filename)
+
+
+def run_grid(spec, cache_dir, processes=None, verbose=True):
+    """
+    Run every point of a grid across a process pool, reusing the memoized results in cache_dir so that re-running
+    a grid only computes the new or changed points. Results are memoized as soon as each point finishes.
+
+    :param spec: grid specification, see expand_grid
+    :param cache_dir: directory of the memoized results, one JSON file per point
+    :param processes: number of worker processes, None for one per CPU
+    :return: list of (config, seed, results) in grid order
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    points = expand_grid(spec)
+    keys = [point_key(config, seed) for config, seed in points]
+    results = {key: load_memoized(cache_dir, key) for key in keys}
+    pending = {key: (config, seed) for key, (config, seed) in zip(keys, points) if results[key] is None}
+    if verbose:
+        print(f"{len(points)} points, {len(points) - len(pending)} memoized, {len(pending)} to run")
+    if pending:
+        with Pool(processes) as pool:
+            tasks = [(key, config, seed) for key, (config, seed) in pending.items()]
+            for done, (key, point_results) in enumerate(pool.imap_unordered(_run_point, tasks), 1):
+                config, seed = pending[key]
+                save_memoized(cache_dir, key, config, seed, point_results)
+                results[key] = point_results
+                if verbose:
+                    print(f"[{done}/{len(pending)}] seed {seed} {describe(config)}: stopped at "
+                          f"{point_results[-1]['num_services']} services")
+    return [(config, seed, results[key]) for (config, seed), key in zip(points, keys)]
+
+
+def describe(config):
+    """The parameters of config that differ from the defaults, as name=value"""
+    defaults = default_config()
+    return ' '.join(f"{name}={value}" for name, value in sorted(config.items()) if value != defaults[name]) or \
+        'defaults'
+
+
+def summarize_grid(runs):
+    """
+    Combine the seeds of each configuration: the load where the sweep stopped (first level reaching the blocking
+    limit) and the savings ratio of grooming averaged over the levels.
+
+    :param runs: list of (config, seed, results) as returned by run_grid
+    :return: list of {'config', 'seeds', 'stop_load_mean', 'stop_load_ci', 'savings_mean', 'savings_ci'}
+    """
+    grouped = {}
+    for config, _, results in runs:
+        key = json.dumps(config, sort_keys=True)
+        grouped.setdefault(key, (config, []))[1].append(results)
+    summary = []
+    for config, sweeps in grouped.values():
+        entry = {'config': config, 'seeds': len(sweeps)}
+        entry['stop_load_mean'], entry['stop_load_ci'] = confidence_interval(
+            [results[-1]['num_services'] for results in sweeps])
+        entry['savings_mean'], entry['savings_ci'] = confidence_interval(
+            [sum(savings_ratio(result) for result in results) / len(results) for results in sweeps])
+        summary.append(entry)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a parameter grid of load sweeps with memoized results')
+    parser.add_argument('config', help='JSON grid specification: {"grid": {...}, "fixed": {...}, "seeds": N}')
+    parser.add_argument('--cache', default='grid_cache', help='directory of the memoized point results')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--results', default=None, help='write the per-configuration summary (.csv, .jsonl, .parquet)')
+    args = parser.parse_args()
+
+    with open(args.config) as file:
+        spec = json.load(file)
+    summary = summarize_grid(run_grid(spec, args.cache, args.processes))
+    for entry in summary:
+        print(f"{describe(entry['config'])}: {entry['seeds']} seeds, "
+              f"stops at {entry['stop_load_mean']:.1f} ± {entry['stop_load_ci']:.1f} services, "
+              f"savings {entry['savings_mean']:.2%} ± {entry['savings_ci']:.2%}")
+    if args.results:
+        with ResultSink(args.results) as sink:
+            for entry in summary:
+                record = {name: value for name, value in entry.items() if name != 'config'}
+                record.update(entry['config'])
+                sink.write(record)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import heapq
+
+import OTH_en
+
+
+class AuxiliaryGraphEngine:
+    """
+    Grooming engine that picks the route of a service, and with it the nodes where it is groomed, with one
+    shortest-path query on a layered auxiliary graph built from the Network state:
+    - WDM layer: one edge per link, using the spare capacity of the link's last lightpath (cost spare_cost)
+      or setting up new lightpaths (cost lightpath_cost per new WDM)
+    - OTN layer: a grooming edge at every intermediate node, switching the service through the OTN2 switch
+      (cost grooming_cost), only present if the node has the I/O cards and capacity for both exchanges
+    - access layer: add/drop edges at the end points, only present if the end point has headroom
+    - every hop also costs card_cost per new OTN2 I/O card it takes at each end, so routes do not wander over
+      spare lightpaths at the price of the cards of many nodes, and congestion_cost times the squared fill
+      (used fraction of the OTN2 I/O cards or capacity, whichever is higher) of the node it enters, so traffic
+      spreads before hub nodes run out
+    Edge weights are read from Network.hop_usage and Network.screen_node when the query reaches them, so the
+    auxiliary graph is never materialized and a query costs O(m log n) for m links.
+    """
+
+    def __init__(self, network, graph, lightpath_cost=1.0, grooming_cost=0.1, spare_cost=0.2, card_cost=0.5,
+                 congestion_cost=3.0):
+        """
+        :param network: Network the services are admitted on (admit/release state and headroom index)
+        :param graph: networkx topology of the network
+        :param lightpath_cost: weight of each new lightpath (WDM)
+        :param grooming_cost: weight of grooming the service at an intermediate node
+        :param spare_cost: weight of a hop over a link, so shorter routes win unless a detour saves a lightpath
+        :param card_cost: weight of each new I/O card a hop takes at each of its ends
+        :param congestion_cost: weight of the squared fill of the node a hop enters
+        """
+        self.network = network
+        self.adjacency = {node: list(neighbours) for node, neighbours in graph.adjacency()}
+        self.lightpath_cost = lightpath_cost
+        self.grooming_cost = grooming_cost
+        self.spare_cost = spare_cost
+        self.card_cost = card_cost
+        self.congestion_cost = congestion_cost
+
+    def route(self, odu_size, source, destination):
+        """
+        Cheapest feasible path on the auxiliary graph. A node's feasibility as a grooming node depends on the hop
+        it is reached by, which is the one of its cheapest label (one label per node keeps the query polynomial).
+
+        :param odu_size: '10' or '100'
+        :param source: starting node
+        :param destination: ending node
+        :return: (path as a list of nodes, number of new lightpaths) or (None, 0) if no feasible path is found
+        """
+        network = self.network
+        distance = {source: 0.0}
+        previous = {source: None}
+        arriving_usage = {source: None}  # hop_usage of the hop each node was reached by
+        new_lightpaths = {source: 0}
+        done = set()
+        heap = [(0.0, 0, source)]
+        sequence = 1  # Tie-breaker so equal costs are expanded in discovery order
+        while heap:
+            cost, _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            if node == destination:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = previous[node]
+                return path[::-1], new_lightpaths[destination]
+            incoming = arriving_usage[node]
+            for neighbour in self.adjacency[node]:
+                if neighbour in done:
+                    continue
+                usage = network.hop_usage(odu_size, node, neighbour)
+                if node == source:
+                    # Access edge: add at the source
+                    if network.screen_node(odu_size, node, [usage], True) is not None:
+                        continue
+                    edge_cost = 0.0
+                else:
+                    # Grooming edge through the OTN2 switch of an intermediate node
+                    if network.screen_node(odu_size, node, [incoming, usage], False) is not None:
+                        continue
+                    edge_cost = self.grooming_cost
+                # Access edge: drop at the destination
+                if neighbour == destination and network.screen_node(odu_size, neighbour, [usage], True) is not None:
+                    continue
+                edge_cost += self.spare_cost + self.lightpath_cost * usage[1] + self.card_cost * usage[0]
+                headroom = network.headroom[neighbour]
+                fill = max(1 - headroom[2] / OTH_en.MAX_IO_CARDS, 1 - headroom[3] / OTH_en.MAX_CAPACITY)
+                edge_cost += self.congestion_cost * fill * fill
+                if cost + edge_cost < distance.get(neighbour, float('inf')):
+                    distance[neighbour] = cost + edge_cost
+                    previous[neighbour] = node
+                    arriving_usage[neighbour] = usage
+                    new_lightpaths[neighbour] = new_lightpaths[node] + usage[1]
+                    heapq.heappush(heap, (cost + edge_cost, sequence, neighbour))
+                    sequence += 1
+        return None, 0
+
+    def groom(self, service):
+        """
+        Route a service from TrafficSimulator.generate_service and admit it on the network
+
+        :return: the admitted {'odu_size', 'path'} entry, or None if blocked
+        """
+        path, _ = self.route(service['rate'], service['source'], service['destination'])
+        if path is None:
+            return None
+        grooming_service = {
+            'odu_size': service['rate'],
+            'path': path
+        }
+        can_use, _ = self.network.admit(grooming_service)
+        return grooming_service if can_use == 1 else None
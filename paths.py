@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from collections import OrderedDict
+from itertools import islice
+from multiprocessing import Pool
+
+import networkx as nx
+import numpy as np
+
+
+def topology_fingerprint(graph, weight=None, edges=None):
+    """
+    Hash the edges (and link weights, if used) of a graph, so cached paths are only reused on the same topology.
+
+    :param graph: networkx Graph
+    :param weight: edge attribute used as link weight, None for hop count
+    :param edges: (m, 2) integer array of the graph's edges (duplicates allowed), saves walking the graph when
+                  weight is None
+    :return: hex digest string
+    """
+    digest = hashlib.sha1(f"{weight}\n".encode())
+    if all(isinstance(node, int) for node in graph):
+        # Integer node names: hash the sorted, deduplicated edge array in bulk
+        if edges is None or weight:
+            edge_list = list(graph.edges(data=weight or False, default=None))
+            edges = np.array([edge[:2] for edge in edge_list], dtype=np.int64).reshape(-1, 2)
+            if weight:
+                weights = np.array([edge[2] for edge in edge_list], dtype=np.float64)
+        edges = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1, 2), axis=1)
+        edges, first = np.unique(edges, axis=0, return_index=True)
+        digest.update(edges.tobytes())
+        if weight:
+            digest.update(weights[first].tobytes())
+        return digest.hexdigest()
+
+    edges = []
+    for node1, node2, data in graph.edges(data=True):
+        end1, end2 = sorted((repr(node1), repr(node2)))
+        edges.append(f"{end1} {end2} {data.get(weight) if weight else ''}")
+    edges.sort()
+    digest.update("\n".join(edges).encode())
+    return digest.hexdigest()
+
+
+class PathCache:
+    """LRU cache of k-path results keyed by (source, destination, k, topology fingerprint)"""
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size  # Maximum number of entries kept, None for unbounded
+        self.entries = OrderedDict()  # key -> list of paths, least recently used first
+        self.hits = 0  # Number of lookups answered from the cache
+        self.misses = 0  # Number of lookups that had to compute the paths
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Return the cached paths for key (and mark them recently used), or None"""
+        paths = self.entries.get(key)
+        if paths is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return paths
+
+    def put(self, key, paths):
+        """Store the paths for key, evicting the least recently used entries beyond max_size"""
+        self.entries[key] = paths
+        self.entries.move_to_end(key)
+        if self.max_size is not None:
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self.entries)
+        }
+
+    def save(self, filename):
+        """Write the entries to disk, least recently used first"""
+        temp_filename = filename + '.tmp'
+        with open(temp_filename, 'wb') as file:
+            pickle.dump(list(self.entries.items()), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, filename)
+
+    def load(self, filename):
+        """Add the entries saved in filename, return the number of entries read"""
+        with open(filename, 'rb') as file:
+            items = pickle.load(file)
+        for key, paths in items:
+            self.put(key, paths)
+        return len(items)
+
+
+_worker_graph = None  # Graph shared with the precompute worker processes
+_worker_nodes = None
+_worker_node_index = None
+_worker_weight = None
+
+
+def _init_path_worker(graph, nodes, weight):
+    global _worker_graph, _worker_nodes, _worker_node_index, _worker_weight
+    _worker_graph = graph
+    _worker_nodes = nodes
+    _worker_node_index = {node: index for index, node in enumerate(nodes)}
+    _worker_weight = weight
+
+
+def _paths_from_source(args):
+    """
+    Compute up to max_path paths from one source to every node (worker side of PathTable.build), the same way
+    TrafficSimulator.find_k_paths does for each ordered pair
+
+    :return: (source index, paths per destination, nodes per path, node indices of the paths concatenated)
+    """
+    source_index, max_path = args
+    source = _worker_nodes[source_index]
+    counts = np.zeros(len(_worker_nodes), dtype=np.int64)
+    lengths = []
+    path_nodes = []
+    for destination_index, destination in enumerate(_worker_nodes):
+        if destination_index == source_index:
+            continue
+        try:
+            paths = list(islice(nx.shortest_simple_paths(_worker_graph, source, destination, weight=_worker_weight),
+                                max_path))
+        except nx.NetworkXNoPath:
+            paths = []
+        counts[destination_index] = len(paths)
+        for path in paths:
+            lengths.append(len(path))
+            path_nodes.extend(_worker_node_index[node] for node in path)
+    return source_index, counts, np.array(lengths, dtype=np.int64), np.array(path_nodes, dtype=np.int64)
+
+
+def _write_npy(filename, raw_filename, dtype, length):
+    """Write a 1-D .npy file from a raw file of length values, copying it in blocks"""
+    with open(filename, 'wb') as file, open(raw_filename, 'rb') as raw_file:
+        np.lib.format.write_array_header_1_0(file, {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                                                    'fortran_order': False, 'shape': (length,)})
+        shutil.copyfileobj(raw_file, file)
+    os.remove(raw_filename)
+
+
+class PathTable:
+    """
+    Precomputed k paths for every ordered node pair, stored as flat arrays and memory-mapped read-only.
+    Files: <prefix>.meta.json, <prefix>.pairs.npy (offsets of each pair's paths, pair = source * n + destination),
+    <prefix>.paths.npy (offsets of each path's nodes) and <prefix>.nodes.npy (node indices of all paths).
+    Processes that open the same table share the mapped pages instead of copying them.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        with open(prefix + '.meta.json', 'r') as file:
+            meta = json.load(file)
+        self.max_path = meta['max_path']  # k used when the table was built
+        self.weight = meta['weight']  # Edge attribute used as link weight, None for hop count
+        self.fingerprint = meta['fingerprint']  # topology_fingerprint of the graph the table was built on
+        self.nodes = meta['nodes']  # Node names in index order
+        self.node_index = {node: index for index, node in enumerate(self.nodes)}
+        self.pair_offsets = np.load(prefix + '.pairs.npy', mmap_mode='r')
+        self.path_offsets = np.load(prefix + '.paths.npy', mmap_mode='r')
+        self.path_nodes = np.load(prefix + '.nodes.npy', mmap_mode='r')
+
+    def __getstate__(self):
+        # Only the prefix travels to other processes, which map the files themselves
+        return {'prefix': self.prefix}
+
+    def __setstate__(self, state):
+        self.__init__(state['prefix'])
+
+    def get(self, source, destination, max_path=None):
+        """Return up to max_path (default: all stored) paths from source to destination as lists of nodes"""
+        num_nodes = len(self.nodes)
+        pair = self.node_index[source] * num_nodes + self.node_index[destination]
+        first_path = self.pair_offsets[pair]
+        last_path = self.pair_offsets[pair + 1]
+        if max_path is not None:
+            last_path = min(last_path, first_path + max_path)
+        paths = []
+        for path in range(first_path, last_path):
+            indices = self.path_nodes[self.path_offsets[path]:self.path_offsets[path + 1]]
+            paths.append([self.nodes[index] for index in indices.tolist()])
+        return paths
+
+    @staticmethod
+    def build(graph, max_path, prefix, weight=None, processes=None):
+        """
+        Compute k paths for all ordered node pairs across a process pool and write them as a PathTable. Each
+        direction is computed on its own, so the table holds exactly what find_k_paths returns without it (Yen's
+        ties are not symmetric). The paths of each source are written to disk as soon as they arrive, so memory
+        holds a few sources at a time rather than the whole table.
+
+        :param graph: networkx Graph
+        :param max_path: number of paths per pair
+        :param prefix: file prefix of the table
+        :param weight: edge attribute used as link weight, None for hop count
+        :param processes: number of worker processes, None for one per CPU
+        :return: the opened PathTable
+        """
+        nodes = list(graph.nodes())
+        num_nodes = len(nodes)
+        if os.path.exists(prefix + '.meta.json'):
+            os.remove(prefix + '.meta.json')
+        index_type = np.int32 if num_nodes < 2 ** 31 else np.int64
+        pair_offsets = np.lib.format.open_memmap(prefix + '.pairs.npy', mode='w+', dtype=np.int64,
+                                                 shape=(num_nodes * num_nodes + 1,))
+        pair_offsets[0] = 0
+        num_paths = 0
+        num_path_nodes = 0
+        tasks = [(source_index, max_path) for source_index in range(num_nodes)]
+        with open(prefix + '.paths.raw', 'wb') as path_file, open(prefix + '.nodes.raw', 'wb') as node_file, \
+                Pool(processes, initializer=_init_path_worker, initargs=(graph, nodes, weight)) as pool:
+            path_file.write(np.zeros(1, dtype=np.int64).tobytes())
+            # In source order, so each chunk extends the flat arrays; the pool computes ahead meanwhile
+            for source_index, counts, lengths, path_nodes in pool.imap(_paths_from_source, tasks):
+                first_pair = source_index * num_nodes
+                pair_offsets[first_pair + 1:first_pair + num_nodes + 1] = num_paths + np.cumsum(counts)
+                path_file.write((num_path_nodes + np.cumsum(lengths)).tobytes())
+                node_file.write(path_nodes.astype(index_type).tobytes())
+                num_paths += len(lengths)
+                num_path_nodes += len(path_nodes)
+        pair_offsets.flush()
+        del pair_offsets
+        _write_npy(prefix + '.paths.npy', prefix + '.paths.raw', np.int64, num_paths + 1)
+        _write_npy(prefix + '.nodes.npy', prefix + '.nodes.raw', index_type, num_path_nodes)
+
+        # The metadata is written last, so a table whose build was interrupted does not open
+        with open(prefix + '.meta.json', 'w') as file:
+            json.dump({
+                'max_path': max_path,
+                'weight': weight,
+                'fingerprint': topology_fingerprint(graph, weight),
+                'nodes': nodes
+            }, file)
+        return PathTable(prefix)
@@ -0,0 +1,83 @@
+import csv
+import json
+import time
+from contextlib import nullcontext
+
+_NULL_PHASE = nullcontext()  # Returned by phase() when profiling is off, so disabled timing costs one attribute check
+
+
+class _Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        phases = self.profiler.phases
+        phases[self.name] = phases.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class Profiler:
+    """
+    Wall time per phase and hot-path counters, collected into one record per load level.
+    Disabled by default; phase() and count() then return immediately.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = {}  # Phase name -> seconds since the last checkpoint
+        self.counters = {}  # Counter name -> count since the last checkpoint
+        self.records = []  # One record per checkpoint
+
+    def phase(self, name):
+        """Context manager adding the wall time of its block to the named phase"""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def count(self, name, amount=1):
+        """Add amount to the named counter"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def checkpoint(self, **fields):
+        """Close the current record (e.g. a load level) with the given fields and start a new one"""
+        if not self.enabled:
+            return
+        record = dict(fields)
+        for name, seconds in self.phases.items():
+            record['time_' + name] = seconds
+        record.update(self.counters)
+        if self.counters.get('services'):
+            record['rejected_candidates_per_service'] = (self.counters.get('candidates_rejected', 0) /
+                                                         self.counters['services'])
+        self.records.append(record)
+        self.phases = {}
+        self.counters = {}
+
+    def reset(self):
+        """Drop all records and running totals"""
+        self.phases = {}
+        self.counters = {}
+        self.records = []
+
+    def write(self, filename):
+        """Write the records as JSON, or as CSV if filename ends with .csv"""
+        if filename.endswith('.csv'):
+            columns = []
+            for record in self.records:
+                columns.extend(column for column in record if column not in columns)
+            with open(filename, 'w', newline='') as file:
+                writer = csv.DictWriter(file, fieldnames=columns, restval=0)
+                writer.writeheader()
+                writer.writerows(self.records)
+        else:
+            with open(filename, 'w') as file:
+                json.dump(self.records, file, indent=2)
+
+
+profiler = Profiler()  # Shared instance used by the simulator, enable with profiler.enabled = True
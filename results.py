@@ -0,0 +1,232 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+
+
+class ResultSink:
+    """
+    Append result records to a file as soon as they are computed, so partial results of a running sweep can be read.
+    The format follows the extension: .csv, .jsonl or .parquet (needs pyarrow). A Parquet file is only readable once
+    its footer is written, so .parquet is a directory holding one complete part file per record, which
+    read_results (or pyarrow.parquet.read_table) reads as one table.
+    """
+
+    def __init__(self, filename, append=False):
+        """
+        :param filename: results file, .csv, .jsonl or .parquet
+        :param append: keep the records of an existing file (resumed runs), otherwise it is replaced
+        """
+        self.filename = filename
+        self.format = os.path.splitext(filename)[1].lower().lstrip('.')
+        if self.format not in ('csv', 'jsonl', 'parquet'):
+            raise ValueError(f"Unsupported results format {filename!r}, expected .csv, .jsonl or .parquet")
+        if not append:
+            if os.path.isdir(filename):
+                shutil.rmtree(filename)
+            elif os.path.exists(filename):
+                os.remove(filename)
+        self.columns = None  # CSV/Parquet columns, fixed by the first record
+        self._file = None
+        self._writer = None
+        self._parts = None  # Number of Parquet part files written so far
+
+    def write(self, record):
+        """Append one record and flush it to disk"""
+        if self.format == 'jsonl':
+            if self._file is None:
+                self._file = open(self.filename, 'a')
+            self._file.write(json.dumps(record) + '\n')
+            self._file.flush()
+        elif self.format == 'csv':
+            if self._file is None:
+                new_file = not os.path.exists(self.filename) or os.path.getsize(self.filename) == 0
+                self._file = open(self.filename, 'a', newline='')
+                if new_file:
+                    self.columns = list(record)
+                else:
+                    with open(self.filename, 'r', newline='') as existing:
+                        self.columns = next(csv.reader(existing))
+                self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction='ignore')
+                if new_file:
+                    self._writer.writeheader()
+            self._writer.writerow(record)
+            self._file.flush()
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._parts is None:
+                self._open_parquet()
+            table = pa.Table.from_pylist([record])
+            if self.columns is None:
+                self.columns = table.column_names
+            part = os.path.join(self.filename, f"part-{self._parts:06d}.parquet")
+            # Hidden while written (readers skip names starting with '.'), then renamed into place
+            temp_part = os.path.join(self.filename, f".part-{self._parts:06d}.parquet.tmp")
+            pq.write_table(table.select(self.columns), temp_part)
+            os.replace(temp_part, part)
+            self._parts += 1
+
+    def _open_parquet(self):
+        """Create the Parquet directory, or continue after the parts and columns of an earlier run"""
+        import pyarrow.parquet as pq
+        if os.path.isfile(self.filename):
+            # Single Parquet file of an earlier version: keep its rows as the first part
+            table = pq.read_table(self.filename)
+            os.replace(self.filename, self.filename + '.tmp')
+            os.makedirs(self.filename)
+            os.replace(self.filename + '.tmp', os.path.join(self.filename, 'part-000000.parquet'))
+            self.columns = table.column_names
+        os.makedirs(self.filename, exist_ok=True)
+        parts = sorted(name for name in os.listdir(self.filename)
+                       if name.startswith('part-') and name.endswith('.parquet'))
+        self._parts = int(parts[-1][len('part-'):-len('.parquet')]) + 1 if parts else 0
+        if parts and self.columns is None:
+            self.columns = pq.read_schema(os.path.join(self.filename, parts[0])).names
+
+    def truncate(self, records):
+        """
+        Keep only the first records records of the file: a resumed run drops the levels written after its
+        checkpoint was taken, which it computes again
+        """
+        self.close()
+        if not os.path.exists(self.filename):
+            return
+        if self.format == 'parquet':
+            import pyarrow.parquet as pq
+            self._open_parquet()
+            kept = 0
+            for name in sorted(name for name in os.listdir(self.filename)
+                               if name.startswith('part-') and name.endswith('.parquet')):
+                part = os.path.join(self.filename, name)
+                rows = pq.read_metadata(part).num_rows
+                if kept >= records:
+                    os.remove(part)
+                elif kept + rows > records:
+                    # Only a converted single-file result holds several rows in one part
+                    pq.write_table(pq.read_table(part).slice(0, records - kept), part + '.tmp')
+                    os.replace(part + '.tmp', part)
+                kept += rows
+            self._parts = None
+            return
+        with open(self.filename, 'r', newline='') as file:
+            if self.format == 'csv':
+                rows = list(csv.reader(file))[:records + 1]  # Header and records
+            else:
+                lines = [line for line in file if line.strip()][:records]
+        with open(self.filename + '.tmp', 'w', newline='') as file:
+            if self.format == 'csv':
+                csv.writer(file).writerows(rows)
+            else:
+                file.writelines(lines)
+        os.replace(self.filename + '.tmp', self.filename)
+
+    def close(self):
+        """Close the file"""
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def read_results(filename):
+    """Read the records written by a ResultSink (or a JSON list of records)"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.jsonl':
+        with open(filename, 'r') as file:
+            return [json.loads(line) for line in file if line.strip()]
+    if extension == '.csv':
+        with open(filename, 'r', newline='') as file:
+            return [{key: _number(value) for key, value in row.items()} for row in csv.DictReader(file)]
+    if extension == '.parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(filename).to_pylist()
+    with open(filename, 'r') as file:
+        return json.load(file)
+
+
+def _number(value):
+    """CSV values back to int/float where possible"""
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def plot_results(results, output_dir=None):
+    """
+    Plot lightpaths, savings ratio and blocking rate against the number of services.
+    matplotlib is only imported here, so headless runs that never plot do not load it.
+
+    :param results: list of result records
+    :param output_dir: write the figures as PNG files into this directory instead of showing them
+    """
+    import matplotlib
+    if output_dir is not None:
+        matplotlib.use('Agg')  # No display needed to write files
+    import matplotlib.pyplot as plt
+
+    # Extracting data
+    num_services = [entry['num_services'] for entry in results]
+    no_grooming_lightpaths = [entry['no_grooming_lightpaths'] for entry in results]
+    grooming_lightpaths = [entry['grooming_lightpaths'] for entry in results]
+    blocked_percentage = [entry['blocked_percentage'] for entry in results]
+
+    # Calculate Savings Ratio
+    savings_ratio = [(ng - g) / ng if ng != 0 else 0 for ng, g in zip(no_grooming_lightpaths, grooming_lightpaths)]
+
+    # Create multiple windows and display them simultaneously
+    fig1 = plt.figure()
+    plt.plot(num_services, no_grooming_lightpaths, marker='o', linestyle='-', color='b', label='No Grooming')
+    plt.plot(num_services, grooming_lightpaths, marker='s', linestyle='-', color='g', label='Grooming')
+    plt.xlabel('Number of Services')
+    plt.ylabel('Lightpaths')
+    plt.title('No Grooming vs Grooming Lightpaths')
+    plt.legend()
+    plt.grid(True)
+
+    fig2 = plt.figure()
+    plt.plot(num_services, savings_ratio, marker='d', linestyle='-', color='m')
+    plt.xlabel('Number of Services')
+    plt.ylabel('Savings Ratio')
+    plt.title('Savings Ratio (Grooming vs No Grooming)')
+    plt.grid(True)
+
+    fig3 = plt.figure()
+    plt.plot(num_services, blocked_percentage, marker='^', linestyle='-', color='r')
+    plt.xlabel('Number of Services')
+    plt.ylabel('Blocked Percentage')
+    plt.title('Number of Services vs Blocked Percentage')
+    plt.grid(True)
+
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        for figure, name in ((fig1, 'lightpaths'), (fig2, 'savings_ratio'), (fig3, 'blocking')):
+            figure.savefig(os.path.join(output_dir, name + '.png'))
+            plt.close(figure)
+        return
+
+    # Shwo
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plot the results written by a simulation run')
+    parser.add_argument('results', help='results file (.csv, .jsonl, .parquet or JSON list)')
+    parser.add_argument('--output-dir', default='plots', help='directory the PNG figures are written to')
+    args = parser.parse_args()
+    plot_results(read_results(args.results), args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from admission import AdmissionState, preload
+from R_en import TrafficSimulator
+
+
+@pytest.fixture
+def state():
+    random.seed(0)
+    simulator = TrafficSimulator(30)
+    simulator.create_network(edge_probability=0.2)
+    return AdmissionState(simulator)
+
+
+def test_rejects_invalid_paths(state):
+    graph = state.simulator.graph
+    neighbour = next(iter(graph[0]))
+    not_adjacent = next(node for node in graph if node != 0 and not graph.has_edge(0, node))
+    invalid = [
+        [[0, not_adjacent]],  # Hop without a link
+        [[0, neighbour, 0, neighbour]],  # Not simple
+        [[0, neighbour], [neighbour, 0]],  # Different end points
+        [[0, 999]],  # Unknown node
+        [[0]],
+        []
+    ]
+    for paths in invalid:
+        for op in ('query', 'evaluate', 'admit'):
+            assert 'error' in state.handle({'op': op, 'paths': paths})
+    assert 'error' in state.handle({'op': 'admit', 'source': 0, 'destination': not_adjacent,
+                                    'paths': [[0, neighbour]]})
+    assert state.status()['services'] == 0
+    assert state.network.wdm_count == 0
+
+
+def test_admit_takes_the_path_query_reports(state):
+    rng = random.Random(1)
+    for _ in range(200):
+        source, destination = rng.sample(sorted(state.simulator.graph), 2)
+        request = {'source': source, 'destination': destination, 'rate': rng.choice(['10', '100']),
+                   'policy': rng.choice([None, 'first_fit', 'capacity_aware'])}
+        query = state.handle(dict(request, op='query'))
+        admitted = state.handle(dict(request, op='admit'))
+        assert (admitted['fits'], admitted['path'], admitted['wdm_delta']) == \
+               (query['fits'], query['path'], query['wdm_delta'])
+    assert state.status()['services'] > 0
+
+
+def test_release_restores_the_state(state):
+    admitted = state.handle([{'op': 'admit', 'source': 0, 'destination': node, 'rate': '100'}
+                             for node in range(1, 20)])
+    for reply in admitted:
+        if reply['fits']:
+            state.handle({'op': 'release', 'id': reply['id']})
+    assert state.status()['services'] == 0
+    assert state.network.wdm_count == 0
+    assert 'error' in state.handle({'op': 'release', 'id': admitted[0]['id']})
+
+
+def test_preload_skips_services_without_paths():
+    random.seed(2)
+    simulator = TrafficSimulator(30)
+    simulator.create_network(edge_probability=0.03, connected=False)
+    services = simulator.generate_services(100)
+    assert any(not service['possible_paths'] for service in services)
+    state = AdmissionState(simulator)
+    admitted = preload(state, services)
+    assert 0 < admitted < len(services)
+    assert state.status()['services'] == admitted
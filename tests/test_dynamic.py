@@ -0,0 +1,36 @@
+from checkpoint import load_checkpoint
+from dynamic import run_dynamic
+from R_en import TrafficSimulator
+
+
+def make_simulator(seed=3, num_nodes=20):
+    simulator = TrafficSimulator(num_nodes)
+    simulator.seed_streams(seed)
+    simulator.create_network(edge_probability=0.3)
+    return simulator
+
+
+def test_resume_matches_uninterrupted_run(tmp_path):
+    parameters = dict(arrival_rate=300, mean_holding_time=1.0, num_arrivals=3000, warmup_arrivals=300, batches=10)
+    straight = run_dynamic(make_simulator(), **parameters)
+
+    # The checkpoint file holds the last snapshot, taken 300 arrivals before the end
+    checkpoint_file = str(tmp_path / 'dynamic.ckpt')
+    checkpointed = run_dynamic(make_simulator(), **parameters, checkpoint_file=checkpoint_file, checkpoint_every=300)
+    state = load_checkpoint(checkpoint_file)
+    assert 0 < state['arrivals'] < parameters['warmup_arrivals'] + parameters['num_arrivals']
+    resumed = run_dynamic(state['simulator'], **parameters, resume_state=state)
+
+    assert checkpointed == straight
+    assert resumed == straight
+    assert straight['blocked'] > 0
+
+
+def test_resume_with_fresh_simulator(tmp_path):
+    # Stream states come from the snapshot, not from the simulator object passed in
+    parameters = dict(arrival_rate=300, mean_holding_time=1.0, num_arrivals=1000, warmup_arrivals=100, batches=5)
+    straight = run_dynamic(make_simulator(), **parameters)
+    checkpoint_file = str(tmp_path / 'dynamic.ckpt')
+    run_dynamic(make_simulator(), **parameters, checkpoint_file=checkpoint_file, checkpoint_every=400)
+    state = load_checkpoint(checkpoint_file)
+    assert run_dynamic(make_simulator(), **parameters, resume_state=state) == straight
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from failures import affected_services, run_failure_scenario, run_failure_sweep
+from R_en import TrafficSimulator, build_network, groom_service
+
+
+@pytest.fixture
+def loaded():
+    random.seed(5)
+    simulator = TrafficSimulator(15)
+    simulator.create_network(edge_probability=0.3)
+    network = build_network(simulator)
+    for service in simulator.generate_services(150):
+        groom_service(network, service)
+    return network, simulator.graph
+
+
+def snapshot(network):
+    """Everything a scenario changes and must give back"""
+    def index(services):
+        return {key: sorted((tuple(service['path']), service['odu_size']) for service in carried.values())
+                for key, carried in services.items() if carried}
+    return (network.wdm_count, dict(network.link_bandwidth), dict(network.headroom),
+            index(network.link_services), index(network.node_services))
+
+
+def test_scenarios_restore_the_network(loaded):
+    network, graph = loaded
+    before = snapshot(network)
+    elements = [tuple(edge) for edge in graph.edges()] + list(graph.nodes())
+    records = []
+    for element in elements:
+        disrupted = len(affected_services(network, element))
+        record = run_failure_scenario(network, graph, element)
+        assert record['disrupted'] == disrupted
+        assert record['restored'] + record['lost'] == disrupted
+        assert snapshot(network) == before
+        records.append(record)
+    assert any(record['disrupted'] for record in records)
+    # Scenarios are independent, so a pool of workers gives the same records
+    assert run_failure_sweep(network, graph, 'all', processes=2) == records
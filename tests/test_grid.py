@@ -0,0 +1,22 @@
+import os
+
+from grid import run_grid
+
+SPEC = {'grid': {'max_path': [2, 3]}, 'fixed': {'nodes': 15, 'edge_probability': 0.3}, 'seeds': 1}
+
+
+def test_grid_reuses_memoized_points(tmp_path, capsys):
+    cache_dir = str(tmp_path / 'cache')
+    first = run_grid(SPEC, cache_dir, processes=1)
+    assert len(first) == 2 and all(results for _, _, results in first)
+    assert len(os.listdir(cache_dir)) == 2
+    capsys.readouterr()
+
+    assert run_grid(SPEC, cache_dir, processes=1) == first
+    assert capsys.readouterr().out.startswith('2 points, 2 memoized, 0 to run')
+
+    # Only the added value runs, the memoized points keep their results
+    extended = dict(SPEC, grid={'max_path': [2, 3, 4]})
+    runs = run_grid(extended, cache_dir, processes=1)
+    assert capsys.readouterr().out.startswith('3 points, 2 memoized, 1 to run')
+    assert runs[:2] == first
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+import OTH_en
+from grooming import AuxiliaryGraphEngine
+from R_en import TrafficSimulator, build_network
+
+
+@pytest.mark.parametrize('model', ['erdos_renyi', 'waxman', 'ring_mesh'])
+def test_routes_are_admitted_and_feasible(model, monkeypatch):
+    # Low limits so that the screening, not the topology, decides most routes
+    monkeypatch.setattr(OTH_en, 'MAX_IO_CARDS', 12)
+    monkeypatch.setattr(OTH_en, 'MAX_CAPACITY', 3000)
+    monkeypatch.setattr(OTH_en, 'MAX_ODUS', 10)
+    simulator = TrafficSimulator(30)
+    simulator.seed_streams(6, ('topology', 'traffic'))
+    simulator.create_network(edge_probability=0.2, model=model)
+    network = build_network(simulator)
+    engine = AuxiliaryGraphEngine(network, simulator.graph)
+    admitted = []
+    for service in simulator.generate_services(300):
+        path, new_lightpaths = engine.route(service['rate'], service['source'], service['destination'])
+        if path is None:
+            continue
+        assert path[0] == service['source'] and path[-1] == service['destination']
+        assert all(simulator.graph.has_edge(node1, node2) for node1, node2 in zip(path, path[1:]))
+        wdm_count = network.wdm_count
+        grooming_service = {'odu_size': service['rate'], 'path': path}
+        assert network.admit(grooming_service)[0] == 1  # Every screened route fits
+        assert network.wdm_count - wdm_count == new_lightpaths
+        admitted.append(grooming_service)
+    assert 0 < len(admitted) < 300
+    assert all(network.node_violation(node) is None for node in simulator.nodes)
+    assert build_network(simulator).run_network(admitted) == (1, network.wdm_count)
@@ -0,0 +1,60 @@
+import json
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from topology import generate_topology, load_topology, write_edge_list
+
+
+@pytest.fixture
+def topology():
+    edges, _ = generate_topology('waxman', 40, random.Random(3))
+    graph = nx.Graph()
+    graph.add_weighted_edges_from(edges, weight='length')
+    return graph
+
+
+def write_text(graph, filename):
+    with open(filename, 'w') as file:
+        file.write('# node1 node2 length\n\n')
+        for node1, node2, length in graph.edges(data='length'):
+            file.write(f"{node1} {node2} {length!r}\n")
+
+
+def write_json(graph, filename):
+    with open(filename, 'w') as file:
+        json.dump(nx.node_link_data(graph), file)
+
+
+WRITERS = {
+    'edges.txt': write_text,
+    'edges.npy': lambda graph, filename: write_edge_list(
+        filename, list(graph.edges()), [length for _, _, length in graph.edges(data='length')]),
+    'graph.gml': nx.write_gml,
+    'graph.graphml': nx.write_graphml,
+    'graph.json': write_json,
+}
+
+
+@pytest.mark.parametrize('name', WRITERS)
+def test_round_trip_keeps_links_and_lengths(tmp_path, topology, name):
+    filename = str(tmp_path / name)
+    WRITERS[name](topology, filename)
+    graph, edges = load_topology(filename)
+
+    # Formats that store node names as strings are renumbered, the name maps back to the written node
+    original = {node: int(graph.nodes[node].get('name', node)) for node in graph}
+    links = {frozenset((original[node1], original[node2])): float(length)
+             for node1, node2, length in graph.edges(data='length')}
+    assert links == {frozenset((node1, node2)): length for node1, node2, length in topology.edges(data='length')}
+    assert edges.dtype == np.int64
+    assert {frozenset(edge) for edge in edges.tolist()} == {frozenset(edge) for edge in graph.edges()}
+
+
+def test_empty_edge_list(tmp_path):
+    filename = tmp_path / 'empty.txt'
+    filename.write_text('# no links\n')
+    graph, edges = load_topology(str(filename))
+    assert graph.number_of_edges() == 0 and edges.shape == (0, 2)
@@ -0,0 +1,36 @@
+import random
+
+import networkx as nx
+import pytest
+
+from R_en import TrafficSimulator
+
+
+def path_length(graph, path, weight):
+    return sum(graph.edges[hop].get(weight, 1) if weight else 1 for hop in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize('weight', [None, 'length'])
+def test_k_paths_are_the_shortest_simple_paths_in_order(weight):
+    random.seed(2)
+    simulator = TrafficSimulator(12, weight=weight)
+    simulator.create_network(edge_probability=0.3)
+    for node1, node2 in simulator.graph.edges():
+        simulator.graph.edges[node1, node2]['length'] = random.randint(1, 9)
+    simulator.update_topology_fingerprint()
+    graph = simulator.graph
+    for source, destination in [(0, 11), (3, 7), (5, 1)]:
+        paths = simulator.find_k_paths(source, destination, 5)
+        # Ranked by an exhaustive enumeration of every loopless path
+        every_length = sorted(path_length(graph, path, weight)
+                              for path in nx.all_simple_paths(graph, source, destination))
+        lengths = [path_length(graph, path, weight) for path in paths]
+        assert lengths == every_length[:5]
+        assert len({tuple(path) for path in paths}) == len(paths)
+        for path in paths:
+            assert path[0] == source and path[-1] == destination
+            assert len(set(path)) == len(path)
+            assert all(graph.has_edge(*hop) for hop in zip(path, path[1:]))
+        # A cached answer and a shorter k give the same ranking
+        assert simulator.find_k_paths(source, destination, 5) == paths
+        assert simulator.find_k_paths(source, destination, 2) == paths[:2]
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+import OTH_en
+from OTH_en import ArrayNetwork
+from R_en import TrafficSimulator, build_network, select_candidate
+
+
+@pytest.fixture
+def simulator():
+    random.seed(1)
+    simulator = TrafficSimulator(20)
+    simulator.create_network(edge_probability=0.3)
+    return simulator
+
+
+@pytest.fixture
+def tight_limits(monkeypatch):
+    # Low limits so that a few hundred services break each of them
+    monkeypatch.setattr(OTH_en, 'MAX_IO_CARDS', 12)
+    monkeypatch.setattr(OTH_en, 'MAX_CAPACITY', 3000)
+    monkeypatch.setattr(OTH_en, 'MAX_ODUS', 10)
+
+
+def offered_services(simulator, num_services):
+    """Services on their first candidate path, as admit takes them"""
+    return [{'odu_size': service['rate'], 'path': service['possible_paths'][0]}
+            for service in simulator.generate_services(num_services)]
+
+
+def build_array_network(simulator):
+    network = ArrayNetwork()
+    for node in simulator.nodes:
+        network.add_node(node)
+    for node1, node2 in simulator.graph.edges():
+        network.add_connection(node1, node2)
+    return network
+
+
+def test_admit_matches_run_network(simulator, tight_limits):
+    network = build_network(simulator)
+    empty_headroom = {node: network.node_headroom(node) for node in simulator.nodes}
+    admitted = []
+    rejected = 0
+    for service in offered_services(simulator, 300):
+        can_use, wdm_count = network.admit(service)
+        if can_use:
+            admitted.append(service)
+        else:
+            rejected += 1
+        assert wdm_count == network.calculate_wdm_count()
+    assert admitted and rejected
+
+    bulk = build_network(simulator)
+    assert bulk.run_network(admitted) == (1, network.wdm_count)
+    assert {node: network.node_headroom(node) for node in simulator.nodes} == \
+        {node: bulk.node_headroom(node) for node in simulator.nodes}
+
+    for service in reversed(admitted):
+        network.release(service)
+    assert network.wdm_count == 0
+    assert {node: network.node_headroom(node) for node in simulator.nodes} == empty_headroom
+
+
+def test_array_network_matches_network(simulator, tight_limits):
+    network = build_network(simulator)
+    array_network = build_array_network(simulator)
+    services = offered_services(simulator, 300)
+    admitted = []
+    for service in services:
+        result = network.admit(service)
+        assert array_network.admit(service) == result
+        assert array_network.last_violation == network.last_violation
+        if result[0]:
+            admitted.append(service)
+    for service in admitted[::3]:
+        assert array_network.release(service) == network.release(service)
+    for service in services:
+        assert array_network.admit(service) == network.admit(service)
+    assert build_array_network(simulator).run_network(services) == build_network(simulator).run_network(services)
+
+
+def test_evaluate_candidates_matches_admit(simulator, tight_limits):
+    network = build_network(simulator)
+    checked = {True: 0, False: 0}
+    violations = set()
+    for service in simulator.generate_services(200):
+        odu_size = service['rate']
+        wdm_count = network.wdm_count
+        evaluations = network.evaluate_candidates({'odu_size': odu_size}, service['possible_paths'])
+        for evaluation in evaluations:
+            candidate = {'odu_size': odu_size, 'path': evaluation['path']}
+            can_use, admitted_wdm_count = network.admit(candidate)
+            assert bool(can_use) == evaluation['fits']
+            checked[evaluation['fits']] += 1
+            if can_use:
+                assert admitted_wdm_count - wdm_count == evaluation['wdm_delta']
+                network.release(candidate)
+            else:
+                assert network.last_violation == evaluation['violation']
+                violations.add(evaluation['violation'])
+            assert network.wdm_count == wdm_count
+        chosen = select_candidate(evaluations)
+        if chosen is not None:
+            assert network.admit({'odu_size': odu_size, 'path': chosen['path']})[0] == 1
+    assert checked[True] and checked[False]
+    assert violations == {'io_cards', 'capacity', 'odu_count'}
@@ -0,0 +1,46 @@
+import math
+import random
+
+import pytest
+
+import OTH_en
+from R_en import TrafficSimulator
+
+
+@pytest.fixture
+def simulator():
+    random.seed(4)
+    simulator = TrafficSimulator(30)
+    simulator.create_network(edge_probability=0.2)
+    return simulator
+
+
+def test_vectorized_baseline_matches_per_service_loop(simulator):
+    services = simulator.generate_services(400)
+    expected = {}
+    for service in services:
+        path = service['possible_paths'][0]
+        rate = '10G' if service['rate'] == '10' else '100G'
+        for node1, node2 in zip(path, path[1:]):
+            link = expected.setdefault((min(node1, node2), max(node1, node2)), {'10G': 0, '100G': 0})
+            link[rate] += 1
+    per_10, per_100 = OTH_en.LIGHTPATH_CAPACITY // 10, OTH_en.LIGHTPATH_CAPACITY // 100
+    expected_total = sum(math.ceil(link['10G'] / per_10) + math.ceil(link['100G'] / per_100)
+                         for link in expected.values())
+
+    assert simulator.calculate_no_grooming_lightpaths(services) == (expected_total, expected)
+    # Two batches on top of each other give the loads of the whole set
+    _, earlier = simulator.calculate_no_grooming_lightpaths(services[:150])
+    assert simulator.calculate_no_grooming_lightpaths(services[150:], earlier) == (expected_total, expected)
+
+
+def test_hop_without_a_link_is_rejected(simulator):
+    node, neighbour = next(iter(simulator.graph.edges()))
+    not_adjacent = next(other for other in simulator.nodes
+                        if other != node and not simulator.graph.has_edge(node, other))
+    for path in ([node, not_adjacent], [node, neighbour, 1000]):
+        with pytest.raises(KeyError, match='is not a link'):
+            simulator.path_link_indices([[node, neighbour], path])
+    service = {'source': node, 'destination': not_adjacent, 'rate': '10', 'possible_paths': [[node, not_adjacent]]}
+    with pytest.raises(KeyError, match=f"{node}-{not_adjacent}"):
+        simulator.calculate_no_grooming_lightpaths([service])
@@ -0,0 +1,28 @@
+import R_en
+from paths import PathCache
+
+
+def test_save_load_keeps_entries_and_order(tmp_path):
+    cache = PathCache(max_size=3)
+    for key in 'abcd':
+        cache.put(key, [[key]])
+    assert list(cache.entries) == ['b', 'c', 'd']  # 'a' evicted
+    cache.get('b')
+    filename = str(tmp_path / 'paths.cache')
+    cache.save(filename)
+
+    loaded = PathCache(max_size=3)
+    assert loaded.load(filename) == 3
+    assert list(loaded.entries) == ['c', 'd', 'b']
+    assert loaded.get('d') == [['d']] and loaded.get('a') is None
+
+
+def test_seeded_runs_reuse_the_cache(tmp_path, capsys, monkeypatch):
+    # main sets these module settings from its arguments, restore them afterwards
+    for name in ('nbOfNode', 'path_cache_file', 'show_plots', 'routing_policy', 'no_grooming_policy'):
+        monkeypatch.setattr(R_en, name, getattr(R_en, name))
+    arguments = ['--nodes', '20', '--seed', '3', '--headless', '--path-cache', str(tmp_path / 'paths.cache')]
+    R_en.main(arguments)
+    capsys.readouterr()
+    R_en.main(arguments)
+    assert capsys.readouterr().out.splitlines()[-1].endswith('0 misses (100.00%)')
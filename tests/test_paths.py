@@ -0,0 +1,21 @@
+from itertools import islice
+
+import networkx as nx
+
+from paths import PathTable
+
+
+def test_table_matches_find_k_paths(tmp_path):
+    graph = nx.gnp_random_graph(25, 0.25, seed=1)
+    graph.add_node(25)  # Unreachable from every other node
+    table = PathTable.build(graph, 4, str(tmp_path / 'table'), processes=2)
+    for source in graph:
+        for destination in graph:
+            if source == destination:
+                continue
+            try:
+                expected = list(islice(nx.shortest_simple_paths(graph, source, destination), 4))
+            except nx.NetworkXNoPath:
+                expected = []
+            assert table.get(source, destination) == expected
+            assert table.get(source, destination, 2) == expected[:2]
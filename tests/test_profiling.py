@@ -0,0 +1,27 @@
+import random
+
+import OTH_en
+from profiling import profiler
+from R_en import TrafficSimulator, build_network, groom_service, max_path
+
+
+def test_counts_rejected_candidates(monkeypatch):
+    monkeypatch.setattr(OTH_en, 'MAX_IO_CARDS', 12)
+    monkeypatch.setattr(profiler, 'enabled', True)
+    profiler.reset()
+    random.seed(1)
+    simulator = TrafficSimulator(20)
+    simulator.create_network(edge_probability=0.3)
+    network = build_network(simulator)
+    rejected = 0
+    services = simulator.generate_services(200)
+    for service in services:
+        rejected += sum(not evaluation['fits'] for evaluation in
+                        network.evaluate_candidates({'odu_size': service['rate']}, service['possible_paths'][:max_path]))
+        groom_service(network, service)
+    profiler.checkpoint(num_services=len(services))
+    record = profiler.records[-1]
+    profiler.reset()
+    assert rejected > 0
+    assert record['rejected_candidates_per_service'] == rejected / len(services)
+    assert 'rollbacks' not in record
@@ -0,0 +1,29 @@
+import pytest
+
+from results import ResultSink, read_results
+
+
+@pytest.mark.parametrize('extension', ['csv', 'jsonl', 'parquet'])
+def test_sink_appends_across_runs(tmp_path, extension):
+    if extension == 'parquet':
+        pytest.importorskip('pyarrow')
+    filename = str(tmp_path / f"results.{extension}")
+    with ResultSink(filename) as sink:
+        for num_services in (10, 20):
+            sink.write({'num_services': num_services, 'blocked_percentage': 0.5})
+        assert [record['num_services'] for record in read_results(filename)] == [10, 20]  # Readable mid-run
+    with ResultSink(filename, append=True) as sink:  # Resumed run
+        sink.write({'num_services': 30, 'blocked_percentage': 1.5})
+    assert read_results(filename) == [{'num_services': num_services, 'blocked_percentage': blocked}
+                                      for num_services, blocked in ((10, 0.5), (20, 0.5), (30, 1.5))]
+
+
+@pytest.mark.parametrize('extension', ['csv', 'jsonl', 'parquet'])
+def test_new_sink_replaces_old_results(tmp_path, extension):
+    if extension == 'parquet':
+        pytest.importorskip('pyarrow')
+    filename = str(tmp_path / f"results.{extension}")
+    for num_services in (10, 20):
+        with ResultSink(filename) as sink:
+            sink.write({'num_services': num_services})
+    assert read_results(filename) == [{'num_services': 20}]
@@ -0,0 +1,33 @@
+import statistics
+
+from R_en import RATES, AntitheticRandom, PairedRandom, TrafficSimulator
+
+
+def traffic(antithetic):
+    simulator = TrafficSimulator(30)
+    simulator.seed_streams(4, ('topology',))
+    simulator.create_network(edge_probability=0.3)
+    simulator.seed_streams(7, ('traffic',), antithetic)
+    return simulator.generate_services(500)
+
+
+def test_antithetic_traffic_is_negatively_correlated():
+    services = traffic(False)
+    antithetic_services = traffic(True)
+    for draw in (lambda service: service['source'], lambda service: RATES.index(service['rate'])):
+        correlation = statistics.correlation([draw(service) for service in services],
+                                             [draw(service) for service in antithetic_services])
+        assert correlation < -0.9
+
+
+def test_antithetic_draws_stay_uniform():
+    generator = AntitheticRandom('uniform')
+    floats = [generator.random() for _ in range(20000)]
+    assert all(0.0 <= value < 1.0 for value in floats)
+    assert abs(statistics.fmean(floats) - 0.5) < 0.01
+    integers = [generator.randrange(10) for _ in range(20000)]
+    assert set(integers) == set(range(10))
+    assert abs(statistics.fmean(integers) - 4.5) < 0.1
+    generator, antithetic_generator = PairedRandom('pair'), AntitheticRandom('pair')
+    for _ in range(1000):
+        assert generator.randrange(10) + antithetic_generator.randrange(10) == 9
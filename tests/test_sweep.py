@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from checkpoint import load_checkpoint
+from R_en import TrafficSimulator, run_incremental_sweep, run_sweep
+from results import ResultSink, read_results
+
+SWEEP = dict(num_services=50, step=50, max_blocking=0.01, verbose=False)
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptingSink:
+    """Result sink that stops the sweep when its level-th record arrives, before that level is checkpointed"""
+
+    def __init__(self, level):
+        self.level = level
+        self.records = 0
+
+    def write(self, record):
+        self.records += 1
+        if self.records == self.level:
+            raise Interrupted
+
+
+def make_simulator():
+    random.seed(5)
+    simulator = TrafficSimulator(20)
+    simulator.create_network(edge_probability=0.3)
+    return simulator
+
+
+@pytest.mark.parametrize('sweep', [run_sweep, run_incremental_sweep])
+def test_resume_matches_uninterrupted_sweep(tmp_path, sweep):
+    straight = sweep(make_simulator(), **SWEEP)
+    assert len(straight) >= 3
+
+    checkpoint_file = str(tmp_path / 'sweep.ckpt')
+    with pytest.raises(Interrupted):
+        sweep(make_simulator(), **SWEEP, sink=InterruptingSink(3), checkpoint_file=checkpoint_file)
+    state = load_checkpoint(checkpoint_file)
+    assert len(state['results']) == 2
+    random.seed(0)  # The random state comes from the snapshot
+    assert sweep(state['simulator'], **SWEEP, checkpoint_file=checkpoint_file, resume_state=state) == straight
+
+
+class DyingSink(ResultSink):
+    """Result sink that stops the sweep right after writing its level-th record, before that level is checkpointed"""
+
+    def __init__(self, filename, level):
+        super().__init__(filename)
+        self.level = level
+        self.records = 0
+
+    def write(self, record):
+        super().write(record)
+        self.records += 1
+        if self.records == self.level:
+            raise Interrupted
+
+
+@pytest.mark.parametrize('sweep', [run_sweep, run_incremental_sweep])
+@pytest.mark.parametrize('extension', ['csv', 'jsonl', 'parquet'])
+def test_resumed_results_file_has_each_level_once(tmp_path, sweep, extension):
+    if extension == 'parquet':
+        pytest.importorskip('pyarrow')
+    straight = sweep(make_simulator(), **SWEEP)
+    results_file = str(tmp_path / f"results.{extension}")
+    checkpoint_file = str(tmp_path / 'sweep.ckpt')
+    with pytest.raises(Interrupted):
+        with DyingSink(results_file, 3) as sink:
+            sweep(make_simulator(), **SWEEP, sink=sink, checkpoint_file=checkpoint_file)
+    state = load_checkpoint(checkpoint_file)
+    with ResultSink(results_file, append=True) as sink:
+        sweep(state['simulator'], **SWEEP, sink=sink, resume_state=state)
+    assert read_results(results_file) == straight
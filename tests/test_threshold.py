@@ -0,0 +1,37 @@
+import pytest
+
+import experiments
+
+
+@pytest.fixture
+def blocking(monkeypatch):
+    """Replace the simulation with a blocking rate that reaches 1% at 437 services"""
+    loads = []
+
+    def run_load_level(simulator, num_services, verbose=True):
+        loads.append(num_services)
+        return {'blocked_percentage': 0.0 if num_services < 437 else 0.01 + num_services * 1e-6}
+
+    monkeypatch.setattr(experiments, 'run_load_level', run_load_level)
+    return loads
+
+
+@pytest.mark.parametrize('tolerance', [1, 5, 40])
+def test_bisection_brackets_the_threshold(blocking, tolerance):
+    result = experiments.find_blocking_threshold(None, 0.01, tolerance, num_services=30)
+    assert result['low'] < 437 <= result['high'] == result['num_services']
+    assert result['high'] - result['low'] <= tolerance
+    assert result['evaluations'] == len(blocking) == len(result['history'])
+    # Doubling up to 480 takes 5 evaluations, bisecting the 240-480 bracket about log2(240 / tolerance)
+    assert len(blocking) <= 5 + (240 // tolerance).bit_length()
+    if tolerance == 1:
+        assert result['num_services'] == 437
+
+
+def test_invalid_arguments_and_unreached_target(blocking):
+    with pytest.raises(ValueError, match='tolerance'):
+        experiments.find_blocking_threshold(None, tolerance=0)
+    with pytest.raises(ValueError, match='num_services'):
+        experiments.find_blocking_threshold(None, num_services=0)
+    with pytest.raises(ValueError, match='up to 400 services'):
+        experiments.find_blocking_threshold(None, num_services=50, max_services=400)
@@ -0,0 +1,24 @@
+import random
+
+import networkx as nx
+import pytest
+
+from topology import MODELS, generate_topology
+
+
+@pytest.mark.parametrize('model', MODELS)
+def test_generated_topologies_are_connected(model):
+    rng = random.Random(model)
+    edges, _ = generate_topology(model, 300, rng, edge_probability=0.01)
+    graph = nx.Graph()
+    graph.add_nodes_from(range(300))
+    graph.add_edges_from(edge[:2] for edge in edges)
+    assert nx.is_connected(graph)
+    assert all(node1 != node2 for node1, node2 in graph.edges())
+
+
+@pytest.mark.parametrize('model', ['waxman', 'geometric'])
+def test_default_geometric_models_stay_sparse(model):
+    for num_nodes in (500, 5000):
+        edges, _ = generate_topology(model, num_nodes, random.Random(1), connected=False)
+        assert 2 < 2 * len(edges) / num_nodes < 6
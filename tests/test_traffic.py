@@ -0,0 +1,57 @@
+import random
+
+import numpy as np
+
+from R_en import TrafficSimulator, build_network, groom_service, groom_traffic
+from traffic import TrafficStore, segment_positions
+
+
+def seeded_simulator():
+    random.seed(6)
+    simulator = TrafficSimulator(20)
+    simulator.create_network(edge_probability=0.3)
+    return simulator
+
+
+def test_store_round_trips_generated_services():
+    simulator = seeded_simulator()
+    state = random.getstate()
+    services = simulator.generate_services(300)
+    random.setstate(state)
+    store = simulator.generate_traffic(300)
+    assert list(store) == services
+    assert list(TrafficStore.from_services(services)) == services
+
+    # Every distinct path is stored once, and services share it
+    distinct = {tuple(path) for service in services for path in service['possible_paths']}
+    assert len(store.pool) == len(distinct)
+    shared = {}
+    for index in range(len(store)):
+        for path in store.candidate_paths(index):
+            assert shared.setdefault(tuple(path), path) is path
+
+    assert simulator.calculate_no_grooming_lightpaths(store) == simulator.calculate_no_grooming_lightpaths(services)
+
+
+def test_store_grows_and_records_groomed_paths():
+    simulator = seeded_simulator()
+    services = simulator.generate_services(200)
+    store = TrafficStore(pool=simulator.path_pool, capacity=1)
+    for service in services:
+        store.append(service['source'], service['destination'], service['rate'], service['possible_paths'])
+    assert len(store) == 200 and list(store) == services
+
+    network = build_network(simulator)
+    groomed = [groom_service(network, service) for service in services]
+    blocked = groom_traffic(build_network(simulator), store)
+    assert blocked == groomed.count(None)
+    assert list(store.grooming_services()) == [service for service in groomed if service is not None]
+
+
+def test_segment_positions_matches_a_loop():
+    offsets = np.array([0, 3, 3, 7, 9], dtype=np.int64)
+    ids = np.array([2, 0, 1, 2, 3], dtype=np.int64)
+    positions, lengths = segment_positions(offsets, ids)
+    assert positions.tolist() == [position for segment in ids.tolist()
+                                  for position in range(offsets[segment], offsets[segment + 1])]
+    assert lengths.tolist() == [4, 3, 0, 4, 2]
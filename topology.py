@@ -0,0 +1,326 @@
+import json
+import math
+import os
+import random
+
+import networkx as nx
+import numpy as np
+
+
+def erdos_renyi_edges(num_nodes, edge_probability, rng=random):
+    """
+    Erdős–Rényi G(n, p) edges by geometric skipping over the node pairs, so the cost grows with the number of
+    edges instead of the n² pairs.
+
+    :param num_nodes: number of nodes (named 0..num_nodes-1)
+    :param edge_probability: probability of each edge
+    :param rng: random.Random instance or the random module
+    :return: list of (node1, node2) edges
+    """
+    if edge_probability <= 0:
+        return []
+    if edge_probability >= 1:
+        return [(i, j) for i in range(num_nodes) for j in range(i + 1, num_nodes)]
+    edges = []
+    log_q = math.log(1.0 - edge_probability)
+    node = 1
+    other = -1
+    while node < num_nodes:
+        # Number of pairs skipped before the next edge is geometrically distributed
+        other += 1 + int(math.log(1.0 - rng.random()) / log_q)
+        while other >= node and node < num_nodes:
+            other -= node
+            node += 1
+        if node < num_nodes:
+            edges.append((other, node))
+    return edges
+
+
+def random_positions(num_nodes, rng=random):
+    """Uniform node positions in the unit square, format: {node: (x, y)}"""
+    return {node: (rng.random(), rng.random()) for node in range(num_nodes)}
+
+
+def _close_pairs(positions, radius):
+    """Yield (node1, node2, distance) for all pairs closer than radius, using a grid of radius-sized cells"""
+    cells = {}
+    for node, (x, y) in positions.items():
+        cells.setdefault((int(x / radius), int(y / radius)), []).append(node)
+    for (cell_x, cell_y), members in cells.items():
+        for offset_x, offset_y in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            neighbours = cells.get((cell_x + offset_x, cell_y + offset_y))
+            if neighbours is None:
+                continue
+            same_cell = offset_x == 0 and offset_y == 0
+            for index, node1 in enumerate(members):
+                x1, y1 = positions[node1]
+                for node2 in (members[index + 1:] if same_cell else neighbours):
+                    x2, y2 = positions[node2]
+                    distance = math.hypot(x1 - x2, y1 - y2)
+                    if distance < radius:
+                        yield node1, node2, distance
+
+
+def _close_pair_arrays(positions, radius):
+    """
+    Same pairs as _close_pairs as arrays, one distance matrix per pair of neighbouring grid cells
+
+    :return: (node indices in positions order, node indices, distances)
+    """
+    coordinates = np.array(list(positions.values()), dtype=np.float64).reshape(-1, 2)
+    cells = {}
+    for index, cell in enumerate(map(tuple, np.floor(coordinates / radius).astype(np.int64).tolist())):
+        cells.setdefault(cell, []).append(index)
+    cells = {cell: np.array(members, dtype=np.int64) for cell, members in cells.items()}
+    firsts, seconds, distances = [], [], []
+    for (cell_x, cell_y), members in cells.items():
+        for offset_x, offset_y in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            neighbours = cells.get((cell_x + offset_x, cell_y + offset_y))
+            if neighbours is None:
+                continue
+            distance = np.hypot(coordinates[members, 0][:, None] - coordinates[neighbours, 0][None, :],
+                                coordinates[members, 1][:, None] - coordinates[neighbours, 1][None, :])
+            close = distance < radius
+            if offset_x == 0 and offset_y == 0:
+                close = np.triu(close, 1)
+            rows, columns = np.nonzero(close)
+            firsts.append(members[rows])
+            seconds.append(neighbours[columns])
+            distances.append(distance[rows, columns])
+    if not firsts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    return np.concatenate(firsts), np.concatenate(seconds), np.concatenate(distances)
+
+
+def geometric_edges(positions, radius):
+    """Random geometric graph: link every pair of nodes closer than radius, format: [(node1, node2, length)]"""
+    return list(_close_pairs(positions, radius))
+
+
+def waxman_edges(positions, alpha=None, beta=0.4, rng=random, cutoff=1e-4):
+    """
+    Waxman graph: link two nodes at distance d with probability beta * exp(-d / (alpha * L)), L = sqrt(2).
+    Pairs whose probability is below cutoff are not drawn, which keeps the cost close to the number of edges.
+
+    :param alpha: distance scale, default shrinks with the number of nodes for an expected degree of about 4
+    :return: list of (node1, node2, length) edges
+    """
+    if alpha is None:
+        # Away from the borders a node expects n * beta * 2 pi (alpha * L)² links
+        alpha = math.sqrt(4 / (2 * math.pi * beta * max(len(positions), 1))) / math.sqrt(2) if beta > 0 else 0
+    scale = alpha * math.sqrt(2)
+    radius = min(scale * math.log(beta / cutoff), math.sqrt(2)) if beta > cutoff else 0
+    if radius <= 0:
+        return []
+    firsts, seconds, distances = _close_pair_arrays(positions, radius)
+    # One seed from rng drives the vectorized draws, so seeded topologies stay reproducible
+    draws = np.random.default_rng(rng.getrandbits(64)).random(len(distances))
+    linked = draws < beta * np.exp(-distances / scale)
+    nodes = list(positions)
+    return [(nodes[first], nodes[second], distance) for first, second, distance in
+            zip(firsts[linked].tolist(), seconds[linked].tolist(), distances[linked].tolist())]
+
+
+def ring_mesh_edges(num_nodes, chords=None, rng=random):
+    """
+    Ring of all nodes plus random chords, like a metro/regional transport ring with express links.
+
+    :param chords: number of extra links, default num_nodes // 2
+    :return: list of (node1, node2) edges
+    """
+    if num_nodes < 2:
+        return []
+    edges = {(node, node + 1) for node in range(num_nodes - 1)}
+    if num_nodes > 2:
+        edges.add((0, num_nodes - 1))
+    if chords is None:
+        chords = num_nodes // 2
+    chords = min(chords, num_nodes * (num_nodes - 1) // 2 - len(edges))
+    target = len(edges) + chords
+    while len(edges) < target:
+        node1, node2 = rng.sample(range(num_nodes), 2)
+        edges.add((min(node1, node2), max(node1, node2)))
+    return sorted(edges)
+
+
+def degree_bounded_edges(num_nodes, max_degree=4, average_degree=3.0, rng=random):
+    """
+    Connected random graph where no node has more than max_degree links: a random spanning tree with bounded
+    degree, then random links between nodes that still have free ports until average_degree is reached.
+
+    :return: list of (node1, node2) edges
+    """
+    if max_degree < 2 and num_nodes > 2:
+        raise ValueError("max_degree must be at least 2 to connect more than 2 nodes")
+    order = list(range(num_nodes))
+    rng.shuffle(order)
+    degree = [0] * num_nodes
+    edges = set()
+    open_nodes = [order[0]] if order else []  # Tree nodes that still have a free port
+    for node in order[1:]:
+        index = rng.randrange(len(open_nodes))
+        parent = open_nodes[index]
+        edges.add((min(node, parent), max(node, parent)))
+        degree[node] += 1
+        degree[parent] += 1
+        if degree[parent] >= max_degree:
+            open_nodes[index] = open_nodes[-1]
+            open_nodes.pop()
+        if degree[node] < max_degree:
+            open_nodes.append(node)
+
+    target = min(int(average_degree * num_nodes / 2), num_nodes * max_degree // 2)
+    attempts = 0
+    while len(edges) < target and len(open_nodes) > 1 and attempts < 20 * num_nodes:
+        attempts += 1
+        index1, index2 = rng.sample(range(len(open_nodes)), 2)
+        node1, node2 = open_nodes[index1], open_nodes[index2]
+        edge = (min(node1, node2), max(node1, node2))
+        if edge in edges:
+            continue
+        edges.add(edge)
+        degree[node1] += 1
+        degree[node2] += 1
+        # Remove full nodes, higher index first so the other index stays valid
+        for index in sorted((index1, index2), reverse=True):
+            if degree[open_nodes[index]] >= max_degree:
+                open_nodes[index] = open_nodes[-1]
+                open_nodes.pop()
+    return sorted(edges)
+
+
+def connect_components(num_nodes, edges, rng=random):
+    """
+    Return the extra edges that join all connected components into one, chaining a random node of each
+    component to a random node of the next.
+    """
+    parent = list(range(num_nodes))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for edge in edges:
+        root1, root2 = find(edge[0]), find(edge[1])
+        if root1 != root2:
+            parent[root1] = root2
+    components = {}
+    for node in range(num_nodes):
+        components.setdefault(find(node), []).append(node)
+    members = list(components.values())
+    return [(rng.choice(members[index]), rng.choice(members[index + 1])) for index in range(len(members) - 1)]
+
+
+MODELS = ['erdos_renyi', 'waxman', 'geometric', 'ring_mesh', 'degree_bounded']
+
+
+def generate_topology(model, num_nodes, rng=random, connected=True, **options):
+    """
+    Generate the edges of a topology model.
+
+    :param model: one of MODELS
+    :param num_nodes: number of nodes (named 0..num_nodes-1)
+    :param rng: random.Random instance or the random module
+    :param connected: add links between components so the topology is connected
+    :param options: model parameters (edge_probability; alpha, beta; radius; chords; max_degree, average_degree)
+    :return: (edges as (node1, node2) or (node1, node2, length), node positions or None)
+    """
+    positions = None
+    if model == 'erdos_renyi':
+        edges = erdos_renyi_edges(num_nodes, options.get('edge_probability', 0.5), rng)
+    elif model == 'waxman':
+        positions = random_positions(num_nodes, rng)
+        edges = waxman_edges(positions, options.get('alpha'), options.get('beta', 0.4), rng)
+    elif model == 'geometric':
+        positions = random_positions(num_nodes, rng)
+        # Default radius gives an expected degree of about 4
+        radius = options.get('radius', math.sqrt(4 / (math.pi * max(num_nodes, 1))))
+        edges = geometric_edges(positions, radius)
+    elif model == 'ring_mesh':
+        edges = ring_mesh_edges(num_nodes, options.get('chords'), rng)
+    elif model == 'degree_bounded':
+        edges = degree_bounded_edges(num_nodes, options.get('max_degree', 4), options.get('average_degree', 3.0), rng)
+    else:
+        raise ValueError(f"Unknown topology model {model!r}, expected one of {MODELS}")
+
+    if connected:
+        for node1, node2 in connect_components(num_nodes, edges, rng):
+            if positions is None:
+                edges.append((node1, node2))
+            else:
+                (x1, y1), (x2, y2) = positions[node1], positions[node2]
+                edges.append((node1, node2, math.hypot(x1 - x2, y1 - y2)))
+    return edges, positions
+
+
+def read_edge_list(filename):
+    """
+    Read a whitespace separated edge list in bulk: 'node1 node2' or 'node1 node2 length' per line, '#' comments
+    allowed at the start of the file only. A .npy file holds the same columns as a binary array.
+
+    :return: (edges as an int64 array of shape (m, 2), lengths as a float64 array or None)
+    """
+    if filename.endswith('.npy'):
+        data = np.load(filename)
+    else:
+        with open(filename, 'r') as file:
+            position = 0
+            line = file.readline()
+            while line.startswith('#') or not line.strip():
+                if not line:
+                    return np.zeros((0, 2), dtype=np.int64), None
+                position = file.tell()
+                line = file.readline()
+            columns = len(line.split())
+            file.seek(position)
+            data = np.array(file.read().split(), dtype=np.float64 if columns > 2 else np.int64).reshape(-1, columns)
+    edges = data[:, :2].astype(np.int64)
+    lengths = data[:, 2].astype(np.float64) if data.shape[1] > 2 else None
+    return edges, lengths
+
+
+def write_edge_list(filename, edges, lengths=None):
+    """Write edges (and lengths) as a binary .npy edge list, the fastest format for read_edge_list"""
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if lengths is not None:
+        data = np.column_stack([edges, np.asarray(lengths, dtype=np.float64)])
+    else:
+        data = edges
+    np.save(filename, data)
+
+
+def load_topology(filename):
+    """
+    Load a topology from an edge list (.txt/.edges/any other extension, or binary .npy), GML (.gml),
+    GraphML (.graphml) or networkx node-link JSON (.json). Link attributes of GML/GraphML/JSON such as length
+    or fiber count are kept. Graph formats with non-integer node names are renumbered 0..n-1, the original
+    name is kept in the 'name' node attribute.
+
+    :return: (networkx Graph, int64 array of shape (m, 2) with the node pair of each link; edge lists keep the file
+             order and any repeated lines, so only the set of pairs matches the graph)
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in ('.gml', '.graphml', '.json'):
+        if extension == '.gml':
+            graph = nx.Graph(nx.read_gml(filename))
+        elif extension == '.graphml':
+            graph = nx.Graph(nx.read_graphml(filename))
+        else:
+            with open(filename, 'r') as file:
+                graph = nx.Graph(nx.node_link_graph(json.load(file)))
+        if not all(isinstance(node, int) for node in graph.nodes()):
+            graph = nx.convert_node_labels_to_integers(graph, label_attribute='name')
+        edges = np.array(list(graph.edges()), dtype=np.int64).reshape(-1, 2)
+        return graph, edges
+
+    edges, lengths = read_edge_list(filename)
+    graph = nx.Graph()
+    graph.add_nodes_from(np.unique(edges).tolist())
+    if lengths is not None:
+        graph.add_weighted_edges_from(zip(edges[:, 0].tolist(), edges[:, 1].tolist(), lengths.tolist()),
+                                      weight='length')
+    else:
+        graph.add_edges_from(zip(edges[:, 0].tolist(), edges[:, 1].tolist()))
+    return graph, edges
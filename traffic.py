@@ -0,0 +1,130 @@
+import numpy as np
+
+RATES = ['10', '100']  # Rate code -> ODU size, same codes as ArrayNetwork.RATE_CODES
+RATE_CODES = {'10': 0, '100': 1}  # ODU size -> rate code
+
+
+def segment_positions(offsets, ids):
+    """
+    Positions of the segments [offsets[i], offsets[i + 1]) of the given ids in a flat array, concatenated
+
+    :param offsets: int64 array of segment offsets, one more than the number of segments
+    :param ids: int64 array of segment ids, repeats allowed
+    :return: (int64 array of positions, int64 array of segment lengths)
+    """
+    starts = offsets[ids]
+    lengths = offsets[ids + 1] - starts
+    # Output position k of segment j maps to starts[j] + k - (number of positions before segment j)
+    shifts = starts - (np.cumsum(lengths) - lengths)
+    return np.repeat(shifts, lengths) + np.arange(int(lengths.sum()), dtype=np.int64), lengths
+
+
+class PathPool:
+    """
+    Deduplicated paths: every distinct path is stored once and referred to by an integer id, so services between
+    the same nodes share their candidate paths instead of each holding lists of their own.
+    """
+
+    def __init__(self):
+        self.ids = {}  # (first node, last node) -> ids of the distinct paths between them
+        self.paths = []  # Path id -> path as a list of nodes, shared by everything using it (do not modify)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def add(self, path):
+        """Return the id of path, adding it to the pool if it is new (the list itself is kept, not a copy)"""
+        path_ids = self.ids.setdefault((path[0], path[-1]), [])
+        for path_id in path_ids:
+            known = self.paths[path_id]
+            if known is path or known == path:
+                return path_id
+        path_id = len(self.paths)
+        path_ids.append(path_id)
+        self.paths.append(path if isinstance(path, list) else list(path))
+        return path_id
+
+
+class TrafficStore:
+    """
+    Compact list of services: one row per service in a structured array, paths referred to by their id in a
+    PathPool. Row fields: source, destination, rate (code, see RATES), path (id of the chosen path, -1 while not
+    routed or blocked) and candidates (ids of up to max_path candidate paths, shortest first, -1 padded).
+    """
+
+    def __init__(self, max_path=3, pool=None, capacity=1024):
+        """
+        :param max_path: number of candidate paths kept per service
+        :param pool: PathPool to share with other stores, None for a new one
+        :param capacity: number of rows allocated up front, doubled when full
+        """
+        self.max_path = max_path
+        self.pool = pool if pool is not None else PathPool()
+        self.dtype = np.dtype([('source', np.int64), ('destination', np.int64), ('rate', np.int8),
+                               ('path', np.int32), ('candidates', np.int32, (max_path,))])
+        self.rows = np.zeros(max(capacity, 1), dtype=self.dtype)
+        self.size = 0
+
+    @classmethod
+    def from_services(cls, services, max_path=3, pool=None):
+        """Build a store from service dicts as returned by TrafficSimulator.generate_services"""
+        store = cls(max_path, pool, len(services))
+        for service in services:
+            store.append(service['source'], service['destination'], service['rate'], service['possible_paths'])
+        return store
+
+    @property
+    def data(self):
+        """Structured array view of the stored rows"""
+        return self.rows[:self.size]
+
+    def __len__(self):
+        return self.size
+
+    def append(self, source, destination, odu_size, possible_paths):
+        """Add one service with its candidate paths (only the first max_path are kept)"""
+        if self.size == len(self.rows):
+            rows = np.zeros(2 * len(self.rows), dtype=self.dtype)
+            rows[:self.size] = self.rows
+            self.rows = rows
+        row = self.rows[self.size]
+        row['source'] = source
+        row['destination'] = destination
+        row['rate'] = RATE_CODES[odu_size]
+        row['path'] = -1
+        candidates = [self.pool.add(path) for path in possible_paths[:self.max_path]]
+        row['candidates'] = candidates + [-1] * (self.max_path - len(candidates))
+        self.size += 1
+
+    def candidate_paths(self, index):
+        """Candidate paths of one service, shared with the pool"""
+        paths = self.pool.paths
+        return [paths[path_id] for path_id in self.rows['candidates'][index].tolist() if path_id >= 0]
+
+    def service(self, index):
+        """One service as a dict, in the format of TrafficSimulator.generate_service"""
+        row = self.rows[index]
+        return {
+            'source': row['source'].item(),
+            'destination': row['destination'].item(),
+            'rate': RATES[row['rate']],
+            'possible_paths': self.candidate_paths(index)
+        }
+
+    def __iter__(self):
+        return (self.service(index) for index in range(self.size))
+
+    def set_path(self, index, path):
+        """Record the chosen path of a service (one of its candidates or any other path), None for blocked"""
+        self.rows['path'][index] = -1 if path is None else self.pool.add(path)
+
+    def grooming_services(self):
+        """Yield the routed services as {'odu_size', 'path'} entries, the format taken by Network.process_services"""
+        paths = self.pool.paths
+        data = self.data
+        for rate, path_id in zip(data['rate'].tolist(), data['path'].tolist()):
+            if path_id >= 0:
+                yield {
+                    'odu_size': RATES[rate],
+                    'path': paths[path_id]
+                }